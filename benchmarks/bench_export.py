@@ -0,0 +1,178 @@
+"""Benchmark the export pipeline on synthetic sites of increasing size.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_export [--sizes 100 1000 10000] [--save-baseline]
+
+Each size gets a freshly generated site. The benchmark times the
+tokenizer, TOC extraction, component rendering, a cold and a warm
+`export_app`, and template construction for every page. Results are
+written as JSON and compared with benchmarks/baseline.json; any phase
+slower than the baseline by more than --tolerance makes the run exit
+with status 1. Everything runs offline against a stub app.
+"""
+import argparse
+import json
+import logging
+import platform
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.synthetic import generate_site
+from src.blocks import block_registry_cache, load_block_sources, load_components_from_blocks
+from src.core.template import chrome_cache
+from src.export import export_app
+from src.parser import DelimiterParser, iter_sections
+
+BENCH_DIR = Path(__file__).parent
+BASELINE_PATH = BENCH_DIR / "baseline.json"
+RESULTS_DIR = BENCH_DIR / "results"
+
+
+class StubApp:
+    """Stands in for rx.App: records pages without compiling anything."""
+
+    def __init__(self):
+        self.pages = {}
+
+    def add_page(self, component, route: str):
+        self.pages[route] = component
+
+
+class Timer:
+    def __init__(self):
+        self.phases = {}
+
+    def phase(self, name: str, func):
+        start = time.perf_counter()
+        result = func()
+        self.phases[name] = time.perf_counter() - start
+        return result
+
+
+def reset_caches():
+    block_registry_cache.clear()
+    chrome_cache.clear()
+
+
+def bench_size(pages: int, args, workdir: Path) -> dict:
+    timer = Timer()
+    app_folder = timer.phase("generate", lambda: generate_site(
+        workdir / f"site-{pages}",
+        pages=pages,
+        depth=args.depth,
+        paragraphs=args.paragraphs,
+        delimiters=args.delimiters,
+        blocks=args.blocks,
+    ))
+    md_files = sorted((app_folder / "pages").rglob("*.md"))
+    contents = [(md_file, md_file.read_text(encoding="utf-8")) for md_file in md_files]
+
+    reset_caches()
+    sections = timer.phase("tokenize", lambda: [list(iter_sections(content)) for _, content in contents])
+    timer.phase("toc", lambda: [DelimiterParser.toc(page_sections) for page_sections in sections])
+
+    def render():
+        for (md_file, _), page_sections in zip(contents, sections):
+            names = DelimiterParser.referenced_names(page_sections)
+            registry = load_components_from_blocks(md_file.parent / "blocks", names) if names else {}
+            shown = DelimiterParser.shown_names(page_sections)
+            sources = load_block_sources(md_file.parent / "blocks", shown) if shown else {}
+            DelimiterParser(registry, block_sources=sources).render(page_sections)
+    timer.phase("render", render)
+
+    reset_caches()
+    app = StubApp()
+    timer.phase("export_cold", lambda: export_app(app, base_path=app_folder))
+    timer.phase("templates", lambda: [page() for page in app.pages.values()])
+
+    reset_caches()
+    timer.phase("export_warm", lambda: export_app(StubApp(), base_path=app_folder))
+
+    return {"pages": len(md_files), "phases": timer.phases}
+
+
+def compare(results: dict, baseline: dict, tolerance: float, min_delta: float) -> list:
+    """Phases slower than the baseline by more than `tolerance` (and `min_delta` seconds)."""
+    regressions = []
+    for size, result in results.items():
+        for phase, seconds in result["phases"].items():
+            if phase == "generate":
+                continue
+            before = baseline.get(size, {}).get("phases", {}).get(phase)
+            if before is None:
+                continue
+            if seconds > before * (1 + tolerance) and seconds - before > min_delta:
+                regressions.append(f"{size} pages / {phase}: {before:.3f}s -> {seconds:.3f}s")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--depth", type=int, default=1, help="Nav depth of each section")
+    parser.add_argument("--paragraphs", type=int, default=20, help="Paragraphs per page")
+    parser.add_argument("--delimiters", type=int, default=2, help="Block delimiters per page")
+    parser.add_argument("--blocks", type=int, default=5, help="Block files per section")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown vs. baseline (0.25 = 25%%)")
+    parser.add_argument("--min-delta", type=float, default=0.05, help="Ignore slowdowns below this many seconds")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the new baseline")
+    parser.add_argument("--output", type=Path, default=None, help="Where to write the results JSON")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="buridan-bench-") as tmp:
+        for size in args.sizes:
+            print(f"Benchmarking {size} pages...", flush=True)
+            result = bench_size(size, args, Path(tmp))
+            results[str(size)] = result
+            for phase, seconds in result["phases"].items():
+                print(f"  {phase:>12}: {seconds:8.3f}s")
+
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "settings": {
+            "depth": args.depth,
+            "paragraphs": args.paragraphs,
+            "delimiters": args.delimiters,
+            "blocks": args.blocks,
+        },
+        "results": results,
+    }
+
+    output = args.output or RESULTS_DIR / f"export-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"Results written to {output}")
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"Baseline saved to {args.baseline}")
+        return
+
+    if not args.baseline.exists():
+        print("No baseline found, run with --save-baseline to create one.")
+        return
+
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+    if baseline.get("settings") != report["settings"]:
+        print("Baseline was recorded with different settings, skipping comparison.")
+        return
+
+    regressions = compare(results, baseline["results"], args.tolerance, args.min_delta)
+    if regressions:
+        print("PERFORMANCE REGRESSIONS:")
+        for regression in regressions:
+            print(f"  - {regression}")
+        sys.exit(1)
+    print("No regressions against baseline.")
+
+
+if __name__ == "__main__":
+    main()
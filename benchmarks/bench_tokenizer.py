@@ -0,0 +1,102 @@
+"""Micro-benchmark: `iter_sections` vs. the previous two-pass tokenizer plus `extract_toc`.
+
+`iter_sections` yields the headings the TOC is built from, so it is timed
+against the old tokenizer together with the old regex TOC pass, on a page
+of h2 sections (split into heading sections) and one of h3 sections
+(left in the markdown).
+
+Run from the repository root:
+
+    python -m benchmarks.bench_tokenizer [--paragraphs N] [--repeat N]
+"""
+import argparse
+import re
+import timeit
+
+from src.parser import DelimiterParser, iter_sections
+
+
+def legacy_tokenize(content: str) -> list:
+    """The dict-building tokenizer `parse_and_render` used before `iter_sections`."""
+    delimiter_pattern = r'--(\w+)(?:\((\w+)\))?--'
+    sections = []
+    current_pos = 0
+
+    for match in re.finditer(delimiter_pattern, content):
+        if match.start() > current_pos:
+            text_content = content[current_pos:match.start()].strip()
+            if text_content:
+                sections.append({'type': 'content', 'value': text_content})
+        sections.append({'type': 'command', 'command': match.group(1), 'argument': match.group(2)})
+        current_pos = match.end()
+
+    if current_pos < len(content):
+        remaining_content = content[current_pos:].strip()
+        if remaining_content:
+            sections.append({'type': 'content', 'value': remaining_content})
+
+    # Second walk over the sections, as the old render loop did.
+    return [(section['type'], section['value'] if section['type'] == 'content' else section['command']) for section in sections]
+
+
+def legacy_extract_toc(content: str) -> list:
+    """The regex TOC pass `export_app` ran over every page before `iter_sections` produced headings."""
+    toc = []
+    for match in re.finditer(r'^(#{1,2})\s+(.+)', content, re.MULTILINE):
+        level = len(match.group(1))
+        text = match.group(2).strip()
+        anchor = re.sub(r'[^a-z0-9]+', '-', text.lower()).strip('-')
+        toc.append({"level": level, "text": text, "anchor": anchor})
+    return toc
+
+
+def legacy_parse(content: str) -> tuple:
+    """Commands and TOC of a page the old way: tokenize, then extract the TOC in a second scan."""
+    sections = legacy_tokenize(content)
+    commands = [value for kind, value in sections if kind == 'command']
+    return commands, legacy_extract_toc(content)
+
+
+def streaming_parse(content: str) -> tuple:
+    """Same output as `legacy_parse`, from the sections `iter_sections` yields."""
+    sections = list(iter_sections(content))
+    commands = [section.command for section in sections if section.kind == "command"]
+    return commands, DelimiterParser.toc(sections)
+
+
+def make_page(paragraphs: int, hashes: str = "##") -> str:
+    """A long page of headed sections of lorem ipsum, with a block every 3rd one and show_code every 10th."""
+    parts = []
+    for i in range(paragraphs):
+        parts.append(f"{hashes} Section {i}\n\n" + "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 20 + "\n\n")
+        if i % 3 == 0:
+            parts.append(f"--block_{i % 7}--\n\n")
+        if i % 10 == 0:
+            parts.append(f"--show_code(block_{i % 7})--\n\n")
+    return "".join(parts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--paragraphs", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    for hashes in ("##", "###"):
+        content = make_page(args.paragraphs, hashes)
+        print(f"h{len(hashes)} page: {len(content) / 1024:.0f} KiB, {args.paragraphs} paragraphs")
+
+        if legacy_parse(content) != streaming_parse(content):
+            raise SystemExit("The tokenizers disagree on the benchmark page")
+
+        results = {}
+        for name, func in (("legacy", legacy_parse), ("streaming", streaming_parse)):
+            best = min(timeit.repeat(lambda: func(content), number=1, repeat=args.repeat))
+            results[name] = best
+            print(f"{name:>10}: {best * 1000:.2f} ms")
+
+        print(f"   speedup: {results['legacy'] / results['streaming']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
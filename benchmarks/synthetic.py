@@ -0,0 +1,95 @@
+"""Generator for synthetic sites used by the export benchmarks."""
+import random
+import shutil
+from pathlib import Path
+
+import yaml
+
+WORDS = (
+    "lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor "
+    "incididunt ut labore et dolore magna aliqua ut enim ad minim veniam quis nostrud"
+).split()
+
+
+def paragraph(rng: random.Random, words: int = 60) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def page_markdown(rng: random.Random, title: str, paragraphs: int, delimiters: int, block_names: list) -> str:
+    """A page with headings, prose, a code fence and `delimiters` block references."""
+    parts = [f"# {title}\n"]
+    delimiter_slots = set(rng.sample(range(paragraphs), min(delimiters, paragraphs))) if block_names else set()
+    for i in range(paragraphs):
+        if i % 4 == 0:
+            parts.append(f"## {title} part {i // 4}\n")
+        parts.append(paragraph(rng) + "\n")
+        if i % 10 == 5:
+            parts.append("```python\n# example\nprint('hello')\n```\n")
+        if i in delimiter_slots:
+            name = rng.choice(block_names)
+            parts.append(f"--show_code({name})--\n" if i % 2 else f"--{name}--\n")
+    return "\n".join(parts)
+
+
+def block_module(name: str) -> str:
+    return (
+        "import reflex as rx\n"
+        "from reflex import box, text\n\n\n"
+        f"def {name}():\n"
+        f"    return rx.box(rx.text('{name}'), class_name='p-2')\n"
+    )
+
+
+def generate_site(
+    root: Path,
+    pages: int = 100,
+    depth: int = 1,
+    paragraphs: int = 20,
+    delimiters: int = 2,
+    blocks: int = 5,
+    pages_per_section: int = 50,
+    seed: int = 0,
+) -> Path:
+    """Write a site (config.yml, pages/, blocks/) under `root` and return the app folder.
+
+    Pages are spread over sections of `pages_per_section` pages, each nested
+    `depth` folders deep, and every section folder gets `blocks` block files.
+    """
+    rng = random.Random(seed)
+    app_folder = Path(root)
+    if app_folder.exists():
+        shutil.rmtree(app_folder)
+    pages_dir = app_folder / "pages"
+    pages_dir.mkdir(parents=True)
+    (pages_dir / "index.md").write_text("# Home\n\nWelcome.\n", encoding="utf-8")
+
+    nav = [{"Home": "index.md"}]
+    sections = max(1, -(-(pages - 1) // pages_per_section))
+    remaining = pages - 1
+
+    for s in range(sections):
+        titles = [f"Section {s} level {level}" for level in range(depth)]
+        folder = pages_dir.joinpath(*(title.lower().replace(" ", "_") for title in titles))
+        (folder / "blocks").mkdir(parents=True, exist_ok=True)
+
+        block_names = [f"block_{s}_{b}" for b in range(blocks)]
+        for name in block_names:
+            (folder / "blocks" / f"{name}.py").write_text(block_module(name), encoding="utf-8")
+
+        entries = []
+        for p in range(min(pages_per_section, remaining)):
+            file_name = f"page-{p}.md"
+            content = page_markdown(rng, f"Page {s}.{p}", paragraphs, delimiters, block_names)
+            (folder / file_name).write_text(content, encoding="utf-8")
+            entries.append({f"Page {s}.{p}": file_name})
+        remaining -= len(entries)
+
+        for level in reversed(range(depth)):
+            index_folder = pages_dir.joinpath(*(title.lower().replace(" ", "_") for title in titles[:level + 1]))
+            (index_folder / "index.md").write_text(f"# {titles[level]}\n", encoding="utf-8")
+            entries = [{titles[level]: entries}]
+        nav.extend(entries)
+
+    config = {"site_name": "Benchmark Site", "nav": nav}
+    (app_folder / "config.yml").write_text(yaml.safe_dump(config, sort_keys=False), encoding="utf-8")
+    return app_folder
@@ -0,0 +1,327 @@
+import ast
+import functools
+import hashlib
+import importlib.util
+import logging
+import sys
+from pathlib import Path
+from typing import Dict, Callable, Iterable
+
+logger = logging.getLogger(__name__)
+
+# Number of (file, mtime) sources kept for --show_code(...)--.
+SOURCE_CACHE_SIZE = 256
+
+
+def file_signature(py_file: Path) -> tuple:
+    stat = py_file.stat()
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def blocks_signature(blocks_path: Path) -> tuple:
+    """(name, mtime_ns, size) of every blocks/*.py file, used to invalidate cached indexes."""
+    if not blocks_path.exists():
+        return ()
+    return tuple((py_file.name, *file_signature(py_file)) for py_file in sorted(blocks_path.glob("*.py")))
+
+
+def defined_blocks(py_file: Path) -> list:
+    """(name, lineno) of the public top-level names a block file defines itself, found without executing it.
+
+    Names pulled in with `import`/`from ... import` are not included.
+    """
+    tree = ast.parse(py_file.read_bytes(), filename=str(py_file))
+    blocks = []
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            blocks.append((node.name, node.lineno))
+        elif isinstance(node, (ast.Assign, ast.AnnAssign)):
+            targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+            blocks.extend((target.id, node.lineno) for target in targets if isinstance(target, ast.Name))
+    return [(name, lineno) for name, lineno in blocks if not name.startswith("_")]
+
+
+def defined_names(py_file: Path) -> list:
+    return [name for name, _ in defined_blocks(py_file)]
+
+
+class BlockEntry:
+    """Where a block is defined, and its component once the module has been imported.
+
+    `component` stays None until a page references the block, and is set to
+    False when the name turns out not to be a callable defined by the block
+    file itself (e.g. `text = rx.text`).
+    """
+
+    __slots__ = ("file", "lineno", "component")
+
+    def __init__(self, file: Path, lineno: int):
+        self.file = file
+        self.lineno = lineno
+        self.component = None
+
+    def __repr__(self):
+        return f"BlockEntry({self.file.name}:{self.lineno})"
+
+
+class BlockIndex(dict):
+    """{name: BlockEntry} of a blocks folder, plus the names defined by more than one file."""
+
+    __slots__ = ("collisions",)
+
+    def __init__(self):
+        super().__init__()
+        self.collisions = []
+
+    def nbytes(self) -> int:
+        """Approximate memory held by the table: the dict, its keys and its entries."""
+        return sys.getsizeof(self) + sum(sys.getsizeof(name) + sys.getsizeof(entry) for name, entry in self.items())
+
+
+def index_blocks(blocks_path: Path, py_files: list | None = None) -> BlockIndex:
+    """Map every block name to the file and line that define it.
+
+    When two files define the same name, the first file (in name order)
+    wins and the collision is logged. `py_files` (sorted) skips globbing the
+    folder when the caller already listed it.
+    """
+    index = BlockIndex()
+    if py_files is None:
+        if not blocks_path.exists():
+            return index
+        py_files = sorted(blocks_path.glob("*.py"))
+
+    for py_file in py_files:
+        try:
+            blocks = defined_blocks(py_file)
+        except SyntaxError as e:
+            logger.error(f"[blocks] Skipping {py_file}: {e}")
+            continue
+        for name, lineno in blocks:
+            entry = index.get(name)
+            if entry is None:
+                index[name] = BlockEntry(py_file, lineno)
+            elif entry.file != py_file:
+                index.collisions.append((name, entry.file, py_file))
+                logger.warning(
+                    f"[blocks] {name!r} is defined in both {entry.file.name}:{entry.lineno} and "
+                    f"{py_file.name}:{lineno} in {blocks_path}; using {entry.file.name}"
+                )
+    return index
+
+
+@functools.lru_cache(maxsize=SOURCE_CACHE_SIZE)
+def _read_block_source(path: str, mtime_ns: int) -> tuple:
+    """Lines of a block file and the (first, last) line of each top-level statement, keyed by its `lineno`.
+
+    Keyed by mtime so an edited file is re-read; `mtime_ns` is otherwise unused.
+    """
+    source = Path(path).read_text(encoding="utf-8")
+    lines = source.splitlines(keepends=True)
+    ranges = {}
+    for node in ast.parse(source, filename=path).body:
+        decorators = getattr(node, "decorator_list", [])
+        first = min([node.lineno] + [decorator.lineno for decorator in decorators])
+        ranges[node.lineno] = (first, node.end_lineno)
+    return lines, ranges
+
+
+def get_block_source(py_file: Path | str, lineno: int) -> str | None:
+    """Source of the top-level definition at `lineno` in `py_file` (decorators included), or None if there is none."""
+    path = str(py_file)
+    lines, ranges = _read_block_source(path, Path(path).stat().st_mtime_ns)
+    if lineno not in ranges:
+        return None
+    first, last = ranges[lineno]
+    return "".join(lines[first - 1:last])
+
+
+def source_cache_info():
+    return _read_block_source.cache_info()
+
+
+def import_block_module(py_file: Path):
+    spec = importlib.util.spec_from_file_location(py_file.stem, py_file)
+    if spec is None:
+        return None
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _memo_registry() -> dict | None:
+    """Reflex's registry of `rx.memo` components, once a block module has imported reflex."""
+    return getattr(sys.modules.get("reflex.components.component"), "CUSTOM_COMPONENTS", None)
+
+
+class BlockRegistryCache:
+    """Block indexes memoized per blocks folder and block modules memoized per file.
+
+    A folder's AST index is rebuilt only when one of its files changes
+    (mtime or size), and each module is executed once, the first time a page
+    references one of its names, then shared by every page in that folder.
+    Files with identical content share a single module (whose `__file__` is
+    the first copy's). Passing the build's `SiteIndex` takes file lists and
+    signatures from the scan instead of the filesystem.
+
+    Modules register `rx.memo` components and State classes with reflex, so
+    they must not outlive the app they were built for: `reset_modules`
+    drops them between the sites of a multi-site build. Indexes and block
+    sources are plain data and stay shared.
+    """
+
+    def __init__(self):
+        self._indexes = {}
+        self._modules = {}
+        self._by_digest = {}
+        self._memo_tags = set()
+        self.hits = 0
+        self.misses = 0
+        self.shared = 0
+
+    def index(self, blocks_path: Path, site_index=None) -> BlockIndex:
+        if site_index is not None:
+            signature = site_index.blocks_signature(blocks_path)
+        else:
+            signature = blocks_signature(blocks_path)
+        cached = self._indexes.get(blocks_path)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+
+        if site_index is not None:
+            py_files = [entry.path for entry in site_index.block_files(blocks_path)]
+            index = index_blocks(blocks_path, py_files)
+        else:
+            index = index_blocks(blocks_path)
+        self._indexes[blocks_path] = (signature, index)
+        return index
+
+    def module(self, py_file: Path, site_index=None):
+        signature = site_index.file_signature(py_file) if site_index is not None else None
+        if signature is None:
+            signature = file_signature(py_file)
+        cached = self._modules.get(py_file)
+        if cached is not None and cached[0] == signature:
+            self.hits += 1
+            return cached[1]
+
+        self.misses += 1
+        digest = hashlib.sha256(py_file.read_bytes()).hexdigest()
+        module = self._by_digest.get(digest)
+        if module is not None:
+            self.shared += 1
+        else:
+            registry = _memo_registry()
+            before = set(registry) if registry is not None else set()
+            module = import_block_module(py_file)
+            registry = _memo_registry()
+            if registry is not None:
+                self._memo_tags |= set(registry) - before
+            self._by_digest[digest] = module
+        self._modules[py_file] = (signature, module)
+        return module
+
+    def get(self, blocks_path: Path, names: Iterable[str] | None = None, site_index=None) -> Dict[str, Callable]:
+        """Registry of `names` (every indexed name if None), importing only the modules that define them."""
+        index = self.index(blocks_path, site_index)
+        if names is None:
+            names = index.keys()
+
+        registry = {}
+        for name in names:
+            entry = index.get(name)
+            if entry is None:
+                continue
+            if entry.component is None:
+                entry.component = self._component(entry, name, site_index)
+            if entry.component:
+                registry[name] = entry.component
+        return registry
+
+    def _component(self, entry: BlockEntry, name: str, site_index=None):
+        """The block's callable, or False if the name isn't a callable defined by the block file itself."""
+        module = self.module(entry.file, site_index)
+        obj = getattr(module, name, None)
+        if callable(obj) and getattr(obj, "__module__", None) == module.__name__:
+            return obj
+        logger.debug(f"[blocks] {name!r} in {entry.file.name} is not a component defined there, ignoring it")
+        return False
+
+    def sources(self, blocks_path: Path, names: Iterable[str], site_index=None) -> Dict[str, str]:
+        """Source of each of `names`, read at the file and line the folder's index recorded.
+
+        The index is used rather than the imported object, whose code may
+        live elsewhere once it is wrapped (e.g. by `rx.memo`).
+        """
+        index = self.index(blocks_path, site_index)
+        sources = {}
+        for name in names:
+            entry = index.get(name)
+            source = get_block_source(entry.file, entry.lineno) if entry is not None else None
+            if source is not None:
+                sources[name] = source
+        return sources
+
+    def files_for(self, blocks_path: Path, names: Iterable[str], site_index=None) -> set:
+        """Block files that define any of `names`."""
+        index = self.index(blocks_path, site_index)
+        return {index[name].file for name in names if name in index}
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "shared": self.shared,
+            "folders": len(self._indexes),
+            "modules": len(self._modules),
+        }
+
+    def report(self, root: Path | None = None) -> dict:
+        """Per blocks folder (under `root` if given): files, indexed and loaded blocks, name collisions and table size."""
+        folders = {}
+        for blocks_path, (_, index) in sorted(self._indexes.items()):
+            if root is not None and not blocks_path.is_relative_to(root):
+                continue
+            folders[blocks_path.relative_to(root).as_posix() if root is not None else str(blocks_path)] = {
+                "files": len({entry.file for entry in index.values()}),
+                "blocks": len(index),
+                "loaded": sum(1 for entry in index.values() if entry.component),
+                "collisions": [[name, kept.name, other.name] for name, kept, other in index.collisions],
+                "bytes": index.nbytes(),
+            }
+        return folders
+
+    def reset_modules(self):
+        """Forget the imported block modules and unregister the memoized components and State classes they defined."""
+        registry = _memo_registry()
+        if registry is not None:
+            for tag in self._memo_tags:
+                registry.pop(tag, None)
+        reload_state_module = getattr(sys.modules.get("reflex.state"), "reload_state_module", None)
+        if reload_state_module is not None:
+            for name in {module.__name__ for module in self._by_digest.values() if module is not None}:
+                reload_state_module(name)
+        for _, index in self._indexes.values():
+            for entry in index.values():
+                entry.component = None
+        self._modules.clear()
+        self._by_digest.clear()
+        self._memo_tags.clear()
+
+    def clear(self):
+        self.reset_modules()
+        self._indexes.clear()
+        self.hits = 0
+        self.misses = 0
+        self.shared = 0
+
+
+block_registry_cache = BlockRegistryCache()
+
+
+def load_components_from_blocks(blocks_path: Path, names: Iterable[str] | None = None, site_index=None) -> Dict[str, Callable]:
+    return block_registry_cache.get(blocks_path, names, site_index)
+
+
+def load_block_sources(blocks_path: Path, names: Iterable[str], site_index=None) -> Dict[str, str]:
+    return block_registry_cache.sources(blocks_path, names, site_index)
@@ -0,0 +1,168 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:  # .br files are only written when brotli is installed.
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+ASSET_MANIFEST_NAME = "asset-manifest.json"
+HEADERS_NAME = "_headers"
+COMPRESS_CACHE_DIR = "compressed"
+COMPRESSIBLE_SUFFIXES = {".html", ".js", ".mjs", ".css", ".json", ".svg", ".xml", ".txt", ".map", ".ico", ".wasm"}
+# Files smaller than this aren't worth a compressed sibling.
+MIN_COMPRESS_SIZE = 1024
+# A compressed sibling is only kept if it is at most this fraction of the original.
+MAX_COMPRESS_RATIO = 0.9
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+# Bundles emitted by the frontend build under assets/ already carry a content hash, and so
+# do search shards (<hash>.json), image variants (<width>-<hash>.webp) and files
+# fingerprinted here (name.<hash>.ext).
+HASHED_NAME_RE = re.compile(r"(?:^|[.-])[0-9a-f]{10,}\.[^.]+$")
+QUOTED_URL_RE = re.compile(r"""(["'])(/[^"'\s<>]+)\1""")
+
+
+def is_hashed(rel: str) -> bool:
+    return rel.startswith("assets/") or bool(HASHED_NAME_RE.search(rel.rsplit("/", 1)[-1]))
+
+
+def fingerprinted_name(rel: str, digest: str) -> str:
+    path = Path(rel)
+    return path.with_name(f"{path.stem}.{digest[:10]}{path.suffix}").as_posix()
+
+
+def list_files(root: Path) -> dict:
+    """{path relative to root: absolute path} of every file under root."""
+    files = {}
+    for folder, _, names in os.walk(root):
+        for name in names:
+            path = Path(folder) / name
+            files[path.relative_to(root).as_posix()] = path
+    return files
+
+
+def fingerprint(out_dir: Path, files: dict) -> dict:
+    """Give unhashed assets that pages link to a content-hashed copy and point the pages at it.
+
+    Only quoted URLs in HTML files are rewritten; originals are kept for
+    references built at runtime (e.g. by search.js).
+    """
+    html_files = [path for rel, path in files.items() if rel.endswith(".html")]
+    pages = {path: path.read_text(encoding="utf-8") for path in html_files}
+    referenced = {match.group(2) for text in pages.values() for match in QUOTED_URL_RE.finditer(text)}
+
+    renamed = {}
+    for rel, path in list(files.items()):
+        if rel.endswith(".html") or is_hashed(rel) or f"/{rel}" not in referenced:
+            continue
+        digest = hashlib.sha256(path.read_bytes()).hexdigest()
+        new_rel = fingerprinted_name(rel, digest)
+        shutil.copy2(path, out_dir / new_rel)
+        files[new_rel] = out_dir / new_rel
+        renamed[f"/{rel}"] = f"/{new_rel}"
+
+    if renamed:
+        def replace(match):
+            url = renamed.get(match.group(2))
+            return f"{match.group(1)}{url}{match.group(1)}" if url else match.group(0)
+
+        for path, text in pages.items():
+            new_text = QUOTED_URL_RE.sub(replace, text)
+            if new_text != text:
+                path.write_text(new_text, encoding="utf-8")
+    logger.info(f"[build] Fingerprinted {len(renamed)} asset(s)")
+    return renamed
+
+
+def _compress(path: Path, cache_dir: Path) -> dict:
+    data = path.read_bytes()
+    digest = hashlib.sha256(data).hexdigest()
+    sizes = {}
+    encoders = [("gz", lambda raw: gzip.compress(raw, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        encoders.append(("br", lambda raw: brotli.compress(raw, quality=11)))
+
+    for ext, encode in encoders:
+        # Compressed bytes are cached by content hash, so unchanged files are not recompressed.
+        cached = cache_dir / f"{digest}.{ext}"
+        if cached.exists():
+            compressed = cached.read_bytes()
+        else:
+            compressed = encode(data)
+            tmp = cached.with_name(f"{cached.name}.{os.getpid()}.tmp")
+            tmp.write_bytes(compressed)
+            tmp.replace(cached)
+        if len(compressed) <= len(data) * MAX_COMPRESS_RATIO:
+            path.with_name(f"{path.name}.{ext}").write_bytes(compressed)
+            sizes[ext] = len(compressed)
+    return {"hash": digest, "size": len(data), **sizes}
+
+
+def compress(files: dict, cache_dir: Path, workers: int | None = None) -> dict:
+    """Write .gz (and .br with brotli) siblings of compressible files, in a thread pool."""
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    targets = {
+        rel: path for rel, path in files.items()
+        if path.suffix in COMPRESSIBLE_SUFFIXES and path.stat().st_size >= MIN_COMPRESS_SIZE
+    }
+    # zlib and brotli release the GIL, so threads compress in parallel.
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        results = dict(zip(targets, executor.map(lambda path: _compress(path, cache_dir), targets.values())))
+
+    used = {f"{result['hash']}.{ext}" for result in results.values() for ext in ("gz", "br")}
+    for cached in cache_dir.iterdir():
+        if cached.name not in used:
+            cached.unlink()
+    if brotli is None:
+        logger.info("[build] brotli is not installed, only writing .gz files")
+    logger.info(f"[build] Compressed {len(results)} of {len(files)} file(s)")
+    return results
+
+
+def write_manifest(out_dir: Path, files: dict, renamed: dict, compressed: dict):
+    assets = {}
+    for rel, path in sorted(files.items()):
+        entry = compressed.get(rel) or {"size": path.stat().st_size}
+        assets[rel] = {**entry, "immutable": is_hashed(rel)}
+    data = {"fingerprinted": dict(sorted(renamed.items())), "files": assets}
+    (out_dir / ASSET_MANIFEST_NAME).write_text(json.dumps(data, indent=2), encoding="utf-8")
+
+
+def write_headers(out_dir: Path, files: dict):
+    """Cache-Control rules in the Netlify/Cloudflare Pages `_headers` format: hashed files are immutable."""
+    rules = ["/assets/*", f"  Cache-Control: {IMMUTABLE}"]
+    for rel in sorted(files):
+        if is_hashed(rel) and not rel.startswith("assets/"):
+            rules += [f"/{rel}", f"  Cache-Control: {IMMUTABLE}"]
+    (out_dir / HEADERS_NAME).write_text("\n".join(rules) + "\n", encoding="utf-8")
+
+
+def optimize_static_site(static_dir: Path, out_dir: Path, cache_dir: Path, workers: int | None = None) -> dict:
+    """Copy an exported site to `out_dir`, then fingerprint, precompress and describe it for the CDN.
+
+    An existing `out_dir` is only replaced if it is empty or a previous
+    build wrote it, which its asset manifest marks. Anything else raises
+    FileExistsError.
+    """
+    if out_dir.exists():
+        if not out_dir.is_dir() or (any(out_dir.iterdir()) and not (out_dir / ASSET_MANIFEST_NAME).is_file()):
+            raise FileExistsError(f"{out_dir} exists and has no {ASSET_MANIFEST_NAME}, so it wasn't written by a build")
+        shutil.rmtree(out_dir)
+    shutil.copytree(static_dir, out_dir)
+
+    files = list_files(out_dir)
+    renamed = fingerprint(out_dir, files)
+    compressed = compress(files, cache_dir / COMPRESS_CACHE_DIR, workers)
+    write_manifest(out_dir, files, renamed, compressed)
+    write_headers(out_dir, files)
+    return {"files": len(files), "fingerprinted": len(renamed), "compressed": len(compressed)}
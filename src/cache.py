@@ -0,0 +1,159 @@
+import hashlib
+import json
+import logging
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever the shape of cached sections/TOC entries changes.
+CACHE_VERSION = 6
+MANIFEST_NAME = "manifest.json"
+HTML_NAME = "html.json"
+
+
+def hash_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_file(path: Path) -> str:
+    return hash_bytes(path.read_bytes())
+
+
+class BuildCache:
+    """Persistent build manifest keyed by the content hash of each page's markdown.
+
+    Everything stored for a page is derived from its markdown alone: the
+    parsed sections, TOC, referenced block names, search terms and links.
+    Blocks and config.yml only come in at render time, so they are not part
+    of the key. Unchanged pages skip reading, tokenizing, term extraction
+    and link scanning on the next build.
+    """
+
+    def __init__(self, cache_dir: Path, enabled: bool = True):
+        self.cache_dir = cache_dir
+        self.manifest_path = cache_dir / MANIFEST_NAME
+        self.enabled = enabled
+        self.entries = {}
+        self.seen = set()
+        self.rebuilt = {}
+        self.hits = 0
+        if enabled:
+            self.load()
+
+    def load(self):
+        if not self.manifest_path.exists():
+            return
+        try:
+            data = json.loads(self.manifest_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            logger.warning(f"[cache] Ignoring unreadable manifest {self.manifest_path}: {e}")
+            return
+        if data.get("version") != CACHE_VERSION:
+            logger.info("[cache] Manifest version changed, rebuilding every page.")
+            return
+        self.entries = data.get("pages", {})
+
+    def content_hash(self, key: str, md_file: Path, mtime_ns: int, size: int) -> str:
+        """Return the markdown hash, trusting the stored one if mtime and size are unchanged."""
+        entry = self.entries.get(key)
+        if entry and entry.get("mtime_ns") == mtime_ns and entry.get("size") == size:
+            return entry["hash"]
+        return hash_file(md_file)
+
+    def lookup(self, key: str, content_hash: str):
+        """Return the cached entry for a page, or None and record why it must be rebuilt."""
+        self.seen.add(key)
+        if not self.enabled:
+            self.rebuilt[key] = "cache disabled"
+            return None
+
+        entry = self.entries.get(key)
+        if entry is None:
+            self.rebuilt[key] = "new page"
+            return None
+
+        if entry["hash"] != content_hash:
+            self.rebuilt[key] = "content changed"
+            return None
+
+        self.hits += 1
+        return entry
+
+    def store(self, key: str, content_hash: str, mtime_ns: int, size: int, sections: list, toc: list, names: list):
+        self.entries[key] = {
+            "hash": content_hash,
+            "mtime_ns": mtime_ns,
+            "size": size,
+            "reason": self.rebuilt.get(key, "new page"),
+            "sections": sections,
+            "toc": toc,
+            "names": names,
+        }
+
+    def save(self):
+        if not self.enabled:
+            return
+
+        # Drop pages that no longer exist so the manifest doesn't grow forever.
+        pages = {key: entry for key, entry in self.entries.items() if key in self.seen}
+        data = {"version": CACHE_VERSION, "rebuilt": self.rebuilt, "pages": pages}
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        # Keep a .json suffix: the dev server's hot reload ignores json files.
+        tmp_path = self.manifest_path.with_suffix(".tmp.json")
+        tmp_path.write_text(json.dumps(data), encoding="utf-8")
+        tmp_path.replace(self.manifest_path)
+
+        logger.info(
+            f"[cache] {self.hits} page(s) reused, {len(self.rebuilt)} rebuilt "
+            f"(manifest: {self.manifest_path})"
+        )
+
+
+class HtmlCache:
+    """Pre-rendered HTML of markdown sections, keyed by the hash of the markdown and the render settings.
+
+    Rendering markdown (and highlighting its code) is the most expensive
+    step of a pre-rendered build, so its output is kept next to the
+    manifest. Keys only depend on the section text, which also covers
+    sections rewritten by the image pipeline. Entries no section used
+    during a build are dropped when it is saved.
+    """
+
+    def __init__(self, cache_dir: Path, enabled: bool = True):
+        self.path = cache_dir / HTML_NAME
+        self.enabled = enabled
+        self.entries = {}
+        self.used = set()
+        self.hits = 0
+        self.misses = 0
+        if enabled and self.path.exists():
+            try:
+                data = json.loads(self.path.read_text(encoding="utf-8"))
+            except (OSError, ValueError) as e:
+                logger.warning(f"[cache] Ignoring unreadable HTML cache {self.path}: {e}")
+                return
+            if data.get("version") == CACHE_VERSION:
+                self.entries = data.get("html", {})
+
+    def get(self, markdown: str, highlight_lines: int | None, render) -> str:
+        """HTML of `markdown`, from the cache or from `render(markdown, highlight_lines)`."""
+        key = hash_bytes(f"{highlight_lines}\0{markdown}".encode("utf-8"))[:32]
+        self.used.add(key)
+        html = self.entries.get(key)
+        if html is None:
+            self.misses += 1
+            html = self.entries[key] = render(markdown, highlight_lines)
+        else:
+            self.hits += 1
+        return html
+
+    def save(self):
+        if not self.enabled:
+            return
+        data = {"version": CACHE_VERSION, "html": {key: html for key, html in self.entries.items() if key in self.used}}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp.json")
+        tmp_path.write_text(json.dumps(data), encoding="utf-8")
+        tmp_path.replace(self.path)
+        logger.info(f"[cache] HTML: {self.hits} section(s) reused, {self.misses} rendered")
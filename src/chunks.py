@@ -0,0 +1,168 @@
+import hashlib
+import logging
+from pathlib import Path
+
+import reflex as rx
+
+from .parser import Section
+from .settings import GENERATED_DIR
+
+logger = logging.getLogger(__name__)
+
+CHUNKS_DIR = f"{GENERATED_DIR}/chunks"
+SCRIPT_NAME = "chunks.js"
+# Markdown bytes after which a chunk is closed at the next heading.
+CHUNK_BYTES = 20000
+# Chunks rendered into the page itself; later ones load as the reader gets close.
+EAGER_CHUNKS = 2
+# Rough rendered height of a byte of HTML, used to reserve space for unloaded chunks.
+PX_PER_BYTE = 0.25
+
+
+def section_bytes(section: Section) -> int:
+    return section.end - section.start if section.kind != Section.COMMAND else 0
+
+
+def split_chunks(sections: list, chunk_bytes: int = CHUNK_BYTES) -> list:
+    """Group sections into chunks of about `chunk_bytes`, always starting a new chunk at a heading."""
+    chunks = [[]]
+    size = 0
+    for section in sections:
+        if section.kind == Section.HEADING and size >= chunk_bytes and chunks[-1]:
+            chunks.append([])
+            size = 0
+        chunks[-1].append(section)
+        size += section_bytes(section)
+    return chunks if chunks[0] else []
+
+
+def render_chunked(parser, sections: list, chunk_bytes: int = CHUNK_BYTES, eager: int = EAGER_CHUNKS, writer=None) -> list:
+    """Render a page's first `eager` chunks and defer the rest.
+
+    Later chunks become lazily loaded fragments when `writer` is given and
+    they are plain markdown, otherwise they are rendered with
+    content-visibility so the browser skips them until needed.
+    """
+    chunks = split_chunks(sections, chunk_bytes)
+    components = []
+    lazy = 0
+    for i, chunk in enumerate(chunks):
+        if i < eager:
+            components.extend(parser.render(chunk))
+            continue
+        html = parser.render_html(chunk) if writer is not None else None
+        if html is not None:
+            anchors = [section.anchor for section in chunk if section.kind == Section.HEADING]
+            components.append(writer.placeholder(html, anchors))
+            lazy += 1
+        else:
+            components.append(deferred_chunk(parser.render(chunk)))
+    if lazy:
+        components.append(writer.script())
+    return components
+
+
+def deferred_chunk(components: list) -> rx.Component:
+    """A chunk rendered with the page but skipped by layout and paint until it nears the viewport."""
+    return rx.box(
+        *components,
+        style={"content_visibility": "auto", "contain_intrinsic_size": "auto 1500px"},
+    )
+
+
+class ChunkWriter:
+    """Writes the HTML of lazily loaded chunks to assets/buridan/chunks/, named by content hash.
+
+    The page only keeps an empty placeholder with the fragment's URL and
+    the heading anchors it contains; chunks.js fetches the fragment when
+    the placeholder nears the viewport or one of its anchors is requested.
+    """
+
+    def __init__(self, out_dir: Path):
+        self.out_dir = out_dir
+        self.used = set()
+        self.written = 0
+
+    def placeholder(self, html: str, anchors: list) -> rx.Component:
+        name = f"{hashlib.sha256(html.encode('utf-8')).hexdigest()[:16]}.html"
+        if name not in self.used:
+            self.used.add(name)
+            path = self.out_dir / name
+            if not path.exists():
+                self.out_dir.mkdir(parents=True, exist_ok=True)
+                path.write_text(html, encoding="utf-8")
+                self.written += 1
+        # rx.html renders through dangerouslySetInnerHTML, so React leaves the injected markup alone.
+        return rx.html(
+            "",
+            custom_attrs={"data-chunk": f"/{CHUNKS_DIR}/{name}", "data-anchors": " ".join(anchors)},
+            min_height=f"{max(200, int(len(html) * PX_PER_BYTE))}px",
+        )
+
+    def script(self) -> rx.Component:
+        return rx.script(src=f"/{CHUNKS_DIR}/{SCRIPT_NAME}", defer=True)
+
+    def finish(self):
+        """Write chunks.js and delete fragments no page uses anymore."""
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        script = self.out_dir / SCRIPT_NAME
+        if not script.exists() or script.read_text(encoding="utf-8") != CHUNKS_JS:
+            script.write_text(CHUNKS_JS, encoding="utf-8")
+        removed = 0
+        for path in self.out_dir.glob("*.html"):
+            if path.name not in self.used:
+                path.unlink()
+                removed += 1
+        logger.info(f"[chunks] {len(self.used)} lazy chunk(s), {self.written} written, {removed} removed")
+
+
+CHUNKS_JS = r"""(function () {
+  var observer = new IntersectionObserver(function (entries) {
+    entries.forEach(function (entry) {
+      if (entry.isIntersecting) {
+        observer.unobserve(entry.target);
+        load(entry.target);
+      }
+    });
+  }, { rootMargin: "1500px 0px" });
+
+  function load(el) {
+    if (!el._chunk) {
+      el._chunk = fetch(el.dataset.chunk).then(function (r) { return r.text(); }).then(function (html) {
+        el.innerHTML = html;
+        el.style.minHeight = "";
+      });
+    }
+    return el._chunk;
+  }
+
+  // Anchors in chunks that haven't loaded yet: load the chunk, then scroll.
+  function reveal(id) {
+    if (!id || document.getElementById(id)) return;
+    var el = Array.prototype.find.call(document.querySelectorAll("[data-anchors]"), function (c) {
+      return c.dataset.anchors.split(" ").indexOf(id) >= 0;
+    });
+    if (el) load(el).then(function () {
+      var target = document.getElementById(id);
+      if (target) target.scrollIntoView();
+    });
+  }
+
+  // Placeholders appear when React renders a page, including client-side navigation.
+  function scan() {
+    document.querySelectorAll("[data-chunk]:not([data-observed])").forEach(function (el) {
+      el.dataset.observed = "1";
+      observer.observe(el);
+    });
+    reveal(decodeURIComponent(location.hash.slice(1)));
+  }
+
+  new MutationObserver(scan).observe(document.documentElement, { childList: true, subtree: true });
+  document.addEventListener("click", function (event) {
+    var link = event.target.closest && event.target.closest('a[href^="#"]');
+    if (link) reveal(decodeURIComponent(link.getAttribute("href").slice(1)));
+  }, true);
+  window.addEventListener("hashchange", function () { reveal(decodeURIComponent(location.hash.slice(1))); });
+  scan();
+})();
+"""
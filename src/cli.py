@@ -6,6 +6,10 @@ import shutil
 import yaml
 from pathlib import Path
 
+from .nav import NavTree
+from .settings import RESULTS_NAME, get_cache_dir, get_read_only
+from .watch import ChangeTracker, load_config, watch
+
 def check_reflex_installed():
     return shutil.which("reflex") is not None
 
@@ -34,7 +38,7 @@ def get_main_app_folder(target_dir, app_name=None):
     if app_name:
         return os.path.join(target_dir, app_name)
     else:
-        return os.path.join(target_dir, os.path.basename(os.path.normpath(target_dir)))
+        return os.path.join(target_dir, os.path.basename(os.path.abspath(target_dir)))
 
 def copy_file(src_path, dest_path):
     if not os.path.isfile(src_path):
@@ -73,6 +77,15 @@ def copy_parser_file(target_dir, app_name=None):
     dest_parser_path = os.path.join(main_app_folder, "parser.py")
     copy_file(src_parser_path, dest_parser_path)
 
+# Helper modules imported by export.py that are copied alongside it.
+SUPPORT_MODULES = ("blocks.py", "cache.py", "chunks.py", "highlight.py", "images.py", "links.py", "markup.py", "nav.py", "report.py", "scan.py", "search.py", "settings.py")
+
+def copy_support_files(target_dir, app_name=None):
+    main_app_folder = get_main_app_folder(target_dir, app_name)
+    for module_file in SUPPORT_MODULES:
+        src_path = os.path.join(os.path.dirname(__file__), module_file)
+        copy_file(src_path, os.path.join(main_app_folder, module_file))
+
 def copy_core_folder(target_dir, app_name=None):
     main_app_folder = get_main_app_folder(target_dir, app_name)
     src_core_folder = os.path.join(os.path.dirname(__file__), "core")
@@ -130,34 +143,15 @@ def create_missing_indexes(target_dir, app_name=None):
     with open(config_path, "r", encoding="utf-8") as f:
         config = yaml.safe_load(f) or {}
 
-    nav = config.get("nav", [])
-
-    def traverse_nav(nav_list, base_parts=None):
-        base_parts = base_parts or []
-
-        for item in nav_list:
-            if isinstance(item, dict):
-                for title, val in item.items():
-                    if isinstance(val, list):
-                        # This nav item has children — check for index.md
-                        folder_name = title.lower().replace(" ", "_")
-                        folder_path = pages_folder.joinpath(*base_parts, folder_name)
-                        index_file = folder_path / "index.md"
-                        if not index_file.exists():
-                            folder_path.mkdir(parents=True, exist_ok=True)
-                            with open(index_file, "w", encoding="utf-8") as f:
-                                f.write(f"# {title} Index\n")
-                            print(f"Created missing index.md at {index_file.relative_to(main_app_folder)}")
-                        # Recurse into children
-                        traverse_nav(val, base_parts + [folder_name])
-                    elif isinstance(val, str):
-                        # single page — do nothing here
-                        pass
-            elif isinstance(item, str):
-                # single page string, do nothing
-                pass
-
-    traverse_nav(nav)
+    nav_tree = NavTree.compile(config.get("nav", []))
+
+    for section in nav_tree.sections():
+        index_file = pages_folder / section.file
+        if not index_file.exists():
+            index_file.parent.mkdir(parents=True, exist_ok=True)
+            with open(index_file, "w", encoding="utf-8") as f:
+                f.write(f"# {section.title} Index\n")
+            print(f"Created missing index.md at {index_file.relative_to(main_app_folder)}")
 
 def buridan_init(target_dir=".", app_name=None):
     if not check_reflex_installed():
@@ -173,12 +167,142 @@ def buridan_init(target_dir=".", app_name=None):
     copy_config_file(target_dir, app_name)
     copy_export_file(target_dir, app_name)
     copy_parser_file(target_dir, app_name)
+    copy_support_files(target_dir, app_name)
     copy_core_folder(target_dir, app_name)
     copy_state_folder(target_dir, app_name)
     create_pages_folder_with_index(target_dir, app_name)
     create_missing_indexes(target_dir, app_name)
     print("Initialization complete.")
 
+def reload_env(main_app_folder):
+    """Environment for `reflex run` that leaves pages/ and blocks/ reloads to `develop`."""
+    app_folder = Path(main_app_folder).absolute()
+    include = [
+        path for path in app_folder.iterdir()
+        if path.name != "pages" and not path.name.startswith((".", "__"))
+    ]
+    env = os.environ.copy()
+    env["REFLEX_HOT_RELOAD_EXCLUDE_PATHS"] = str(app_folder)
+    env["REFLEX_HOT_RELOAD_INCLUDE_PATHS"] = ":".join(str(path) for path in include)
+    return env
+
+def trigger_reload(main_app_folder):
+    # Touching the app module makes the reflex backend re-import it, which re-runs export_app
+    # for the whole site; the build cache keeps unchanged pages from being parsed again.
+    main_file_path = os.path.join(main_app_folder, f"{os.path.basename(main_app_folder)}.py")
+    os.utime(main_file_path)
+
+def buridan_develop(target_dir=".", app_name=None):
+    if not check_reflex_installed():
+        print(
+            "Reflex is not installed. Please install it first:\n\n"
+            "    pip install reflex\n"
+        )
+        sys.exit(1)
+
+    main_app_folder = get_main_app_folder(target_dir, app_name)
+    if not os.path.isdir(os.path.join(main_app_folder, "pages")):
+        print(f"No pages folder found in {main_app_folder}. Run `buridan-ssg init` first.")
+        sys.exit(1)
+
+    tracker = ChangeTracker(Path(main_app_folder))
+
+    def on_change(changed):
+        pages, chrome_changed = tracker.affected(changed)
+        for page, reason in sorted(pages.items()):
+            print(f"[develop] {page} changed ({reason})")
+        if chrome_changed:
+            print("[develop] config.yml changed")
+        if not pages and not chrome_changed:
+            print(f"[develop] {len(changed)} file(s) changed, no page affected")
+        print("[develop] Reloading the site")
+        trigger_reload(main_app_folder)
+
+    print(f"Starting development server for '{main_app_folder}' (watching pages/, blocks/ and config.yml)...")
+    process = subprocess.Popen(["reflex", "run"], cwd=target_dir, env=reload_env(main_app_folder))
+    try:
+        watch(Path(main_app_folder), on_change, keep_running=lambda: process.poll() is None)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if process.poll() is None:
+            process.terminate()
+        process.wait()
+
+def buridan_build(target_dir=".", app_name=None, output=None, skip_export=False):
+    from .build import optimize_static_site
+
+    main_app_folder = Path(get_main_app_folder(target_dir, app_name))
+    if not skip_export:
+        if not check_reflex_installed():
+            print(
+                "Reflex is not installed. Please install it first:\n\n"
+                "    pip install reflex\n"
+            )
+            sys.exit(1)
+        print(f"Exporting '{main_app_folder}' with reflex...")
+        try:
+            subprocess.run(
+                ["reflex", "export", "--frontend-only", "--no-zip"],
+                stdout=sys.stdout,
+                stderr=sys.stderr,
+                check=True,
+                cwd=target_dir,
+            )
+        except subprocess.CalledProcessError as e:
+            print(f"Error running reflex export: {e}")
+            sys.exit(1)
+
+    static_dir = Path(target_dir) / ".web" / "build" / "client"
+    if not static_dir.is_dir():
+        print(f"No exported site found at {static_dir}. Run without --skip-export first.")
+        sys.exit(1)
+
+    config = load_config(main_app_folder)
+    cache_dir = get_cache_dir(main_app_folder, config, get_read_only(config))
+    out_dir = Path(output) if output else Path(target_dir) / "dist"
+    try:
+        stats = optimize_static_site(static_dir, out_dir, cache_dir)
+    except FileExistsError as e:
+        print(f"{e}. Choose another --output, or empty it first.")
+        sys.exit(1)
+    print(
+        f"Built {stats['files']} file(s) into {out_dir}: "
+        f"{stats['fingerprinted']} fingerprinted, {stats['compressed']} precompressed."
+    )
+
+def buridan_check(target_dir=".", app_name=None):
+    from .links import check_site
+
+    main_app_folder = Path(get_main_app_folder(target_dir, app_name))
+    if not (main_app_folder / "pages").is_dir():
+        print(f"No pages folder found in {main_app_folder}. Run `buridan-ssg init` first.")
+        sys.exit(1)
+
+    broken = check_site(main_app_folder, load_config(main_app_folder))
+    for link in broken:
+        print(link)
+    if broken:
+        print(f"{len(broken)} broken link(s).")
+        sys.exit(1)
+    print("All links resolve.")
+
+def buridan_build_all(sites, workers=1, skip_frontend=False, report=None):
+    # multisite imports reflex, which `--help` and `init` must work without.
+    from .multisite import build_all, format_results, write_results
+
+    missing = [site for site in sites if not (Path(site) / "rxconfig.py").exists()]
+    if missing:
+        print(f"No rxconfig.py found in: {', '.join(missing)}")
+        sys.exit(1)
+    summary = build_all(sites, workers, skip_frontend)
+    report_path = Path(report) if report else Path(RESULTS_NAME)
+    write_results(summary, report_path)
+    print(format_results(summary))
+    print(f"Results written to {report_path}")
+    if not all(result["ok"] for result in summary["sites"]):
+        sys.exit(1)
+
 def main():
     parser = argparse.ArgumentParser(prog="buridan-ssg")
     subparsers = parser.add_subparsers(dest="command")
@@ -194,10 +318,90 @@ def main():
         help="Name of the Reflex app to create",
     )
 
+    develop_parser = subparsers.add_parser(
+        "develop", help="Run the dev server and rebuild changed pages on save"
+    )
+    develop_parser.add_argument(
+        "target_dir", nargs="?", default=".", help="Directory of the Reflex site"
+    )
+    develop_parser.add_argument(
+        "--name",
+        dest="app_name",
+        default=None,
+        help="Name of the Reflex app",
+    )
+
+    build_parser = subparsers.add_parser(
+        "build", help="Export the site and optimize it for static hosting"
+    )
+    build_parser.add_argument(
+        "target_dir", nargs="?", default=".", help="Directory of the Reflex site"
+    )
+    build_parser.add_argument(
+        "--name",
+        dest="app_name",
+        default=None,
+        help="Name of the Reflex app",
+    )
+    build_parser.add_argument(
+        "--output",
+        default=None,
+        help="Output directory (default: <target_dir>/dist)",
+    )
+    build_parser.add_argument(
+        "--skip-export",
+        action="store_true",
+        help="Reuse the last reflex export in .web/build/client",
+    )
+
+    build_all_parser = subparsers.add_parser(
+        "build-all", help="Build several sites in one process, sharing caches between them"
+    )
+    build_all_parser.add_argument(
+        "sites", nargs="+", help="Directories of the Reflex sites (each with an rxconfig.py)"
+    )
+    build_all_parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Forked worker processes to split the sites across (default: 1, build in this process)",
+    )
+    build_all_parser.add_argument(
+        "--skip-frontend",
+        action="store_true",
+        help="Only run the markdown export of each site, not the frontend build",
+    )
+    build_all_parser.add_argument(
+        "--report",
+        default=None,
+        help=f"Where to write per-site timings (default: ./{RESULTS_NAME})",
+    )
+
+    check_parser = subparsers.add_parser(
+        "check", help="Check internal links, nav entries and anchors without building"
+    )
+    check_parser.add_argument(
+        "target_dir", nargs="?", default=".", help="Directory of the Reflex site"
+    )
+    check_parser.add_argument(
+        "--name",
+        dest="app_name",
+        default=None,
+        help="Name of the Reflex app",
+    )
+
     args = parser.parse_args()
 
     if args.command == "init":
         buridan_init(args.target_dir, args.app_name)
+    elif args.command == "develop":
+        buridan_develop(args.target_dir, args.app_name)
+    elif args.command == "build":
+        buridan_build(args.target_dir, args.app_name, args.output, args.skip_export)
+    elif args.command == "build-all":
+        buridan_build_all(args.sites, args.workers, args.skip_frontend, args.report)
+    elif args.command == "check":
+        buridan_check(args.target_dir, args.app_name)
     else:
         parser.print_help()
         sys.exit(1)
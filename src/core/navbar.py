@@ -1,5 +1,7 @@
 import reflex as rx
 
+from .prefetch import link_prefetch
+
 ICON_BOX_STYLE = {
     "_hover": {"background": rx.color("gray", 3)},
     "border": f"0.81px solid {rx.color('gray', 5)}",
@@ -47,7 +49,7 @@ def drawer_sidebar():
 def navbar_site_name(site_name: str) -> rx.Component:
     return rx.text(site_name, class_name="text-md font-bold")
 
-def navbar_links(nav_links: list) -> rx.Component:
+def navbar_links(nav_links: list, hover_prefetch=frozenset()) -> rx.Component:
     return rx.box(
         *[
             rx.link(
@@ -55,18 +57,44 @@ def navbar_links(nav_links: list) -> rx.Component:
                 href=item["url"],
                 class_name="text-sm no-underline font-semibold",
                 color=rx.color('slate', 12),
-                _hover={'color': rx.color('slate', 12)})
+                _hover={'color': rx.color('slate', 12)},
+                **link_prefetch(item["url"], hover_prefetch))
             for item in nav_links
         ],
         class_name="hidden lg:flex flex-row gap-x-6 items-center"
     )
 
-def navbar(site_name: str, main_nav: list):
-    children = [drawer_sidebar(), navbar_site_name(site_name), navbar_links(main_nav)]
+def search_box():
+    """Search input backed by the static index in assets/buridan/search/, queried by search.js in the browser."""
+    return rx.box(
+        rx.el.input(
+            id="buridan-search-input",
+            type="search",
+            placeholder="Search...",
+            auto_complete="off",
+            class_name="w-48 text-sm rounded-md px-2 py-1 outline-none",
+            border=f"0.81px solid {rx.color('gray', 5)}",
+            bg=rx.color('slate', 1),
+        ),
+        rx.box(
+            id="buridan-search-results",
+            class_name="absolute top-9 right-0 w-72 max-h-96 overflow-y-auto rounded-md p-1 shadow-md",
+            bg=rx.color('slate', 1),
+            border=f"0.81px solid {rx.color('gray', 5)}",
+            display="none",
+        ),
+        rx.script(src="/buridan/search/search.js", defer=True),
+        id="buridan-search",
+        class_name="relative hidden md:flex",
+    )
+
+def navbar(site_name: str, main_nav: list, search: bool = False, hover_prefetch=frozenset()):
+    children = [drawer_sidebar(), navbar_site_name(site_name), navbar_links(main_nav, hover_prefetch)]
+    actions = [search_box()] if search else []
     return rx.box(
         rx.box(
             rx.box(*children, class_name="flex flex-row gap-x-6 items-center"),
-            create_theme_toggle(),
+            rx.box(*actions, create_theme_toggle(), class_name="flex flex-row gap-x-4 items-center"),
             class_name="flex flex-row w-full max-w-[75rem] items-center justify-between px-4 xl:px-0"
         ),
         class_name="w-full flex flex-row h-12 items-center absolute justify-center z-[99]"
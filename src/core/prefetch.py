@@ -0,0 +1,23 @@
+import reflex as rx
+
+
+class PrefetchPageLinks(rx.Component):
+    """React Router's <PrefetchPageLinks>: modulepreload links for the code of another route."""
+
+    library = "react-router"
+
+    tag = "PrefetchPageLinks"
+
+    # The route to prefetch.
+    page: rx.Var[str]
+
+
+def prefetch_links(routes) -> rx.Component:
+    """Prefetch the code of `routes` as soon as the page renders."""
+    return rx.fragment(*[PrefetchPageLinks.create(page=route) for route in routes])
+
+
+def link_prefetch(href: str, hover_routes) -> dict:
+    """Props that make a link prefetch its route on hover or focus, for routes in `hover_routes`."""
+    # rx.link renders React Router's <Link> as its child, which receives the prop.
+    return {"custom_attrs": {"prefetch": "intent"}} if href in hover_routes else {}
@@ -1,28 +1,24 @@
 import reflex as rx
-import os
+
+from ..nav import route_for
+from .prefetch import link_prefetch
 
 
 SIDEBAR_CLASSES = "flex flex-col items-center gap-y-4 pt-8"
 
 
 def create_url_path(parent: str, child_file: str):
-    """Convert parent & child file into /parent/child slug (without .md)."""
-    child_slug = os.path.splitext(os.path.basename(child_file))[0]
-
-    # If it's the index page, treat as root route
-    if child_slug == "index":
-        return "/"
-
-    # Avoid double slashes in path
-    return f"/{parent}/{child_slug}".replace("//", "/")
+    """Route of a child file of a section, derived like every other page route (see `route_for`)."""
+    return route_for(f"{parent}/{child_file}")
 
 
-def sidebar(sidebar_title: str, sidebar_items: dict | str | None):
+def sidebar(sidebar_title: str, sidebar_items: dict | str | None, hover_prefetch=frozenset()):
     """Render sidebar section with clickable links.
 
     Args:
         sidebar_title: Title to display at top of sidebar
-        sidebar_items: Dict of {label: md_path} for navigation links
+        sidebar_items: Dict of {label: route} (or {label: md_path}) for navigation links
+        hover_prefetch: Routes whose links prefetch their page on hover
 
     Returns:
         Sidebar component or empty scroll area if no items provided
@@ -35,16 +31,19 @@ def sidebar(sidebar_title: str, sidebar_items: dict | str | None):
         )
 
     # Generate navigation links from sidebar items
-    links = [
-        rx.link(
-            label.replace("-", " ").title(),
-            href=create_url_path(sidebar_title, md_path),
-            class_name="text-sm no-underline font-medium",
-            color=rx.color('slate', 11),
-            _hover={'color': rx.color('slate', 12)}
+    links = []
+    for label, md_path in sidebar_items.items():
+        href = md_path if md_path.startswith("/") else create_url_path(sidebar_title, md_path)
+        links.append(
+            rx.link(
+                label.replace("-", " ").title(),
+                href=href,
+                class_name="text-sm no-underline font-medium",
+                color=rx.color('slate', 11),
+                _hover={'color': rx.color('slate', 12)},
+                **link_prefetch(href, hover_prefetch),
+            )
         )
-        for label, md_path in sidebar_items.items()
-    ]
 
     # Create scrollable sidebar content
     child = rx.scroll_area(
@@ -1,26 +1,172 @@
+import hashlib
+import json
+
 import reflex as rx
 from functools import wraps
+try:
+    # Registry rx.memo adds to. It is private, and newer reflex versions don't have it.
+    from reflex.components.component import CUSTOM_COMPONENTS
+except ImportError:  # Without it, shared components can't be unregistered, so the layout is inlined.
+    CUSTOM_COMPONENTS = None
 
 from .sidebar import sidebar
 from .navbar import navbar
-from .toc import table_of_content
+from .prefetch import prefetch_links
+from .toc import shared_table_of_content, table_of_content, toc_bytes_saved
+
+
+def shared_layout_available() -> bool:
+    return CUSTOM_COMPONENTS is not None
+
+
+def shared_component(name: str, build) -> rx.Component:
+    """`build()` as a memoized component: compiled once into the app's shared
+    components module, and referenced by tag from every page that uses it."""
+    def component() -> rx.Component:
+        return build()
+    component.__name__ = component.__qualname__ = name
+    return rx.memo(component)()
+
+
+class ChromeCache:
+    """Navbar built once per site and sidebar once per section.
+
+    Every page of a section gets the same navbar and sidebar component
+    subtrees instead of rebuilding identical link lists per page. Shared
+    ones are memoized components named after a digest of their inputs, so
+    the compiled frontend holds each link list once and pages only
+    reference it; the rendered bytes each reference saves are kept.
+    """
+
+    def __init__(self):
+        self._navbars = {}
+        self._sidebars = {}
+        self._saved = {}
+        self._shared_bytes = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _get(self, cache: dict, kind: str, key, build, shared: bool):
+        key = (key, shared)
+        if key in cache:
+            self.hits += 1
+            return cache[key]
+        self.misses += 1
+        if not shared:
+            cache[key] = component = build()
+            return component
+        inline = build()
+        # Sets and dicts are sorted so the tag, and the compiled module, are the same on every build.
+        digest = hashlib.sha256(json.dumps(key, default=sorted).encode()).hexdigest()[:12]
+        cache[key] = component = shared_component(f"buridan_{kind}_{digest}", lambda: inline)
+        self._shared_bytes[key] = len(str(inline))
+        self._saved[key] = self._shared_bytes[key] - len(str(component))
+        return component
+
+    @staticmethod
+    def _navbar_key(site_name: str, main_nav: list, search: bool, hover_prefetch) -> tuple:
+        return (site_name, tuple((item["title"], item["url"]) for item in main_nav), search, hover_prefetch)
+
+    @staticmethod
+    def _sidebar_key(sidebar_title: str, sidebar_items: dict | str | None, hover_prefetch) -> tuple:
+        items = tuple(sidebar_items.items()) if isinstance(sidebar_items, dict) else sidebar_items
+        return (sidebar_title, items, hover_prefetch)
+
+    def navbar(self, site_name: str, main_nav: list, search: bool = False, hover_prefetch=frozenset(), shared: bool = False):
+        return self._get(
+            self._navbars,
+            "navbar",
+            self._navbar_key(site_name, main_nav, search, hover_prefetch),
+            lambda: navbar(site_name, main_nav, search, hover_prefetch),
+            shared,
+        )
+
+    def sidebar(self, sidebar_title: str, sidebar_items: dict | str | None, hover_prefetch=frozenset(), shared: bool = False):
+        return self._get(
+            self._sidebars,
+            "sidebar",
+            self._sidebar_key(sidebar_title, sidebar_items, hover_prefetch),
+            lambda: sidebar(sidebar_title, sidebar_items, hover_prefetch),
+            shared,
+        )
+
+    def bytes_saved(
+        self,
+        site_name: str,
+        main_nav: list,
+        sidebar_title: str,
+        sidebar_items: dict | str | None,
+        toc: list,
+        search: bool = False,
+        hover_prefetch=frozenset(),
+    ) -> int:
+        """Rendered bytes a page's shared layout saves over inlining it, building the shared chrome if needed."""
+        self.navbar(site_name, main_nav, search, hover_prefetch, shared=True)
+        self.sidebar(sidebar_title, sidebar_items, hover_prefetch, shared=True)
+        return (
+            self._saved[(self._navbar_key(site_name, main_nav, search, hover_prefetch), True)]
+            + self._saved[(self._sidebar_key(sidebar_title, sidebar_items, hover_prefetch), True)]
+            + toc_bytes_saved(toc)
+        )
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "navbars": len(self._navbars),
+            "sidebars": len(self._sidebars),
+            "shared": len(self._shared_bytes),
+            "shared_bytes": sum(self._shared_bytes.values()),
+        }
+
+    def clear(self):
+        """Forget every component, and unregister the shared ones so the next app doesn't compile them."""
+        for cache in (self._navbars, self._sidebars):
+            for (_, shared), component in cache.items():
+                if shared and CUSTOM_COMPONENTS is not None:
+                    CUSTOM_COMPONENTS.pop(component.tag, None)
+            cache.clear()
+        self._saved.clear()
+        self._shared_bytes.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+chrome_cache = ChromeCache()
+
 
+def template(
+    site_name: str,
+    main_nav: list,
+    sidebar_title: str,
+    sidebar_items: dict,
+    toc: list,
+    search: bool = False,
+    prefetch=(),
+    hover_prefetch=frozenset(),
+    shared_layout: bool = False,
+):
+    """Create a base page template decorator.
 
-def template(site_name: str, main_nav: list, sidebar_title: str, sidebar_items: dict, toc: list):
-    """Create a base page template decorator."""
+    `prefetch` routes have their code fetched as soon as the page renders;
+    navbar and sidebar links to `hover_prefetch` routes fetch it on hover.
+    With `shared_layout`, the navbar, sidebar and TOC are memoized
+    components compiled once, and the page passes only its TOC entries.
+    """
     def decorator(content):
         @wraps(content)
         def template():
             return rx.box(
-                navbar(site_name, main_nav),
+                chrome_cache.navbar(site_name, main_nav, search, hover_prefetch, shared_layout),
                 rx.scroll_area(
                     rx.box(
-                        sidebar(sidebar_title, sidebar_items),
+                        chrome_cache.sidebar(sidebar_title, sidebar_items, hover_prefetch, shared_layout),
                         rx.box(
                             content(),
                             class_name="flex w-full pt-8 lg:pr-16 min-h-screen",
                         ),
-                        table_of_content(toc),
+                        shared_table_of_content(toc=toc) if shared_layout else table_of_content(toc),
+                        prefetch_links(prefetch),
                         class_name="w-full max-w-[75rem] mx-auto h-full flex flex-row gap-x-0",
                     ),
                     class_name="px-4 xl:px-0 pt-12 h-screen w-full overflow-y-auto [&_.rt-ScrollAreaScrollbar]:mt-[4rem] [&_.rt-ScrollAreaScrollbar]:mb-[1rem]",
@@ -1,26 +1,14 @@
+import functools
+
 import reflex as rx
 
 
 SIDEBAR_TOC_CLASSES = "flex flex-col items-center gap-y-4 pt-8"
+TOC_LINK_CLASSES = "text-sm no-underline font-medium"
 
 
-def table_of_content(toc: list):
-    """Render table of contents sidebar with hierarchical links."""
-
-    # Generate TOC links with conditional indentation for level 2 items
-    links = [
-        rx.link(
-            item["text"],
-            href=f"#{item['text']}",
-            class_name=(
-                "text-sm no-underline font-medium" +
-                (" pl-4" if item['level'] == 2 else "")
-            ),
-            color=rx.color('slate', 11),
-            _hover={'color': rx.color('slate', 12)}
-        )
-        for item in toc
-    ]
+def toc_panel(*links) -> rx.Component:
+    """Sticky, scrollable container of the TOC links."""
 
     # Create scrollable content area
     child = rx.scroll_area(
@@ -40,3 +28,59 @@ def table_of_content(toc: list):
         child,
         class_name="hidden lg:flex w-full max-w-52 sticky top-0 max-h-[90vh]"
     )
+
+
+def table_of_content(toc: list):
+    """Render table of contents sidebar with hierarchical links."""
+
+    # Generate TOC links with conditional indentation for level 2 items
+    links = [
+        rx.link(
+            item["text"],
+            href=f"#{item['anchor']}",
+            class_name=(
+                TOC_LINK_CLASSES +
+                (" pl-4" if item['level'] == 2 else "")
+            ),
+            color=rx.color('slate', 11),
+            _hover={'color': rx.color('slate', 12)}
+        )
+        for item in toc
+    ]
+    return toc_panel(*links)
+
+
+@rx.memo
+def shared_table_of_content(toc: rx.Var[list[dict]]) -> rx.Component:
+    """`table_of_content` compiled once: pages pass their [{"level", "text", "anchor"}] list as data."""
+    return toc_panel(
+        rx.foreach(
+            toc,
+            lambda item: rx.link(
+                item["text"],
+                href=f"#{item['anchor']}",
+                class_name=rx.cond(item["level"] == 2, f"{TOC_LINK_CLASSES} pl-4", TOC_LINK_CLASSES),
+                color=rx.color('slate', 11),
+                _hover={'color': rx.color('slate', 12)}
+            ),
+        )
+    )
+
+
+@functools.cache
+def _toc_sizes() -> tuple:
+    """Rendered sizes of an empty TOC and of one entry per level, inline and shared."""
+    sample = {"level": 1, "text": "t", "anchor": "a"}
+    inline = [len(str(table_of_content([{**sample, "level": level}] if level else []))) for level in (0, 1, 2)]
+    shared = [len(str(shared_table_of_content(toc=[sample] if entries else []))) for entries in (0, 1)]
+    return inline[0] - shared[0], inline[1] - inline[0] - (shared[1] - shared[0]), inline[2] - inline[0] - (shared[1] - shared[0])
+
+
+def toc_bytes_saved(toc: list) -> int:
+    """Rendered bytes a page saves by passing `toc` to `shared_table_of_content` instead of inlining its links.
+
+    Estimated from one rendered entry per level, since entry text takes
+    the same room either way.
+    """
+    base, level_1, level_2 = _toc_sizes()
+    return base + sum(level_2 if item["level"] == 2 else level_1 for item in toc)
@@ -1,141 +1,239 @@
 # src/export.py
 import reflex as rx
 import yaml
-import re
 from pathlib import Path
-import importlib.util
-import inspect
-from typing import Dict, Callable
+import os
+import functools
+import time
+from concurrent.futures import ProcessPoolExecutor
 import logging
-from .core.template import template
-from .parser import DelimiterParser
+from .blocks import block_registry_cache, load_block_sources, load_components_from_blocks, source_cache_info
+from .cache import BuildCache, HtmlCache
+from .chunks import CHUNK_BYTES, CHUNKS_DIR, EAGER_CHUNKS, ChunkWriter, render_chunked
+from .core.template import chrome_cache, shared_layout_available, template
+from .highlight import MAX_HIGHLIGHT_LINES, STYLESHEET_PATH, highlight_available, highlight_cache_info, write_stylesheet
+from .images import IMAGE_QUALITY, IMAGE_WIDTHS, IMAGES_DIR, ImagePipeline
+from .links import RouteIndex, check_links, check_nav, check_toc, log_broken, rewrite_source_links, scan_pages
+from .nav import NavTree, route_for
+from .parser import DelimiterParser, Section, iter_sections, markdown_to_html, prerender_available
+from .report import REPORT_NAME, BuildReport, profiled
+from .scan import SiteIndex
+from .search import INDEX_NAME, SEARCH_DIR, SearchIndex, page_terms
+from .settings import config_flag, get_cache_dir, get_read_only
 
 logger = logging.getLogger(__name__)
 
-def kebab_case(text: str) -> str:
-    """Convert 'Getting Started' -> 'getting-started'."""
-    text = text.strip()
-    text = re.sub(r"\s+", "-", text)
-    text = re.sub(r"[^\w\-]", "", text)
-    return text.lower()
+# Parsed pages kept in memory by lazy mode, for the life of one process.
+LAZY_PAGE_CACHE_SIZE = 256
+# Markdown bytes of the neighbor pages a page may prefetch, and the size above which
+# nav links don't prefetch on hover.
+PREFETCH_MAX_BYTES = 200_000
 
-def build_main_nav(nav_raw):
-    """
-    From the raw nav list, build a list of dicts with title and URL for top-level nav items.
-    """
-    main_nav = []
-
-    for item in nav_raw:
-        if isinstance(item, dict):
-            for title, val in item.items():
-                url_part = kebab_case(title)
-
-                if isinstance(val, str):
-                    if val == "index.md":
-                        url = "/"
-                    else:
-                        url = f"/{url_part}/"
-                elif isinstance(val, list):
-                    url = f"/{url_part}/"
-                else:
-                    url = f"/{url_part}/"
-
-                main_nav.append({"title": title, "url": url})
-
-        elif isinstance(item, str):
-            title = item.replace(".md", "")
-            url_part = kebab_case(title)
-            if item == "index.md":
-                url = "/"
-            else:
-                url = f"/{url_part}/"
-            main_nav.append({"title": title.capitalize(), "url": url})
-
-    return main_nav
-
-def clean_nav(nav_raw, exclude_files):
-    nav_dict = {}
-
-    for item in nav_raw:
-        if isinstance(item, dict):
-            for title, val in item.items():
-                if isinstance(val, str):
-                    if val in exclude_files:
-                        continue
-                    nav_dict[kebab_case(title)] = val
-                elif isinstance(val, list):
-                    sub_dict = clean_nav(val, exclude_files)
-                    if sub_dict:
-                        nav_dict[kebab_case(title)] = sub_dict
-        elif isinstance(item, str):
-            if item not in exclude_files:
-                nav_dict[kebab_case(item)] = item
-
-    return nav_dict
-
-def flatten_nav(nav_list, base_parts=None):
-    base_parts = base_parts or []
-    paths = set()
-
-    for item in nav_list:
-        if isinstance(item, dict):
-            for title, val in item.items():
-                if isinstance(val, list):
-                    folder_name = title.lower().replace(" ", "_")
-                    paths |= flatten_nav(val, base_parts + [folder_name])
-                elif isinstance(val, str):
-                    paths.add("/".join(base_parts + [val]))
-        elif isinstance(item, str):
-            paths.add("/".join(base_parts + [item]))
-
-    return paths
-
-def load_components_from_blocks(blocks_path: Path) -> Dict[str, Callable]:
-    registry = {}
-    if not blocks_path.exists():
-        return registry
-
-    for py_file in blocks_path.glob("*.py"):
-        module_name = py_file.stem
-        spec = importlib.util.spec_from_file_location(module_name, py_file)
-        if spec is None:
-            continue
-        module = importlib.util.module_from_spec(spec)
-        spec.loader.exec_module(module)
-
-        for name, obj in inspect.getmembers(module):
-            if inspect.isfunction(obj) or callable(obj):
-                if not name.startswith("_"):
-                    registry[name] = obj
-
-    return registry
-
-def ensure_blocks_folder_for_page(md_file: Path):
+def ensure_blocks_folder_for_page(md_file: Path, site_index: SiteIndex | None = None, read_only: bool = False):
     blocks_folder = md_file.parent / "blocks"
-    if not blocks_folder.exists():
+    exists = site_index.has_folder(blocks_folder) if site_index is not None else blocks_folder.exists()
+    if not exists and not read_only:
         blocks_folder.mkdir(parents=True, exist_ok=True)
+        if site_index is not None:
+            site_index.add_folder(blocks_folder)
         logger.info(f"[export] Created blocks folder at {blocks_folder.relative_to(md_file.parents[1])}")
     return blocks_folder
 
 def extract_toc(markdown_content):
-    toc = []
-    for match in re.finditer(r'^(#{1,2})\s+(.+)', markdown_content, re.MULTILINE):
-        level = len(match.group(1))
-        text = match.group(2).strip()
-        anchor = re.sub(r'[^a-z0-9]+', '-', text.lower()).strip('-')
-        toc.append({"level": level, "text": text, "anchor": anchor})
-    return toc
-
-def export_app(app: rx.App):
-    base_path = Path(__file__).parent
+    """Heading index of a markdown string; pages get theirs from the parse pass instead."""
+    return DelimiterParser.toc(iter_sections(markdown_content))
+
+def parse_page(md_file: Path):
+    """Read a page and return its (sections, toc). Pure, so it can run in a worker process."""
+    sections, toc, _ = parse_page_with_stats(md_file)
+    return sections, toc
+
+def parse_page_with_stats(md_file: Path):
+    """`parse_page` plus the bytes read and the time spent reading and tokenizing."""
+    start = time.perf_counter()
+    data = md_file.read_bytes()
+    content = data.decode("utf-8")
+    read_s = time.perf_counter() - start
+    sections = DelimiterParser.tokenize(content)
+    tokenize_s = time.perf_counter() - start - read_s
+    toc = DelimiterParser.toc(sections)
+    return sections, toc, {"bytes": len(data), "read_s": read_s, "tokenize_s": tokenize_s}
+
+@functools.lru_cache(maxsize=LAZY_PAGE_CACHE_SIZE)
+def _parse_page_cached(path: str, mtime_ns: int, size: int):
+    return parse_page(Path(path))
+
+def load_page(md_file: Path):
+    """`parse_page` through a bounded cache keyed by path, mtime and size."""
+    stat = md_file.stat()
+    return _parse_page_cached(str(md_file), stat.st_mtime_ns, stat.st_size)
+
+def link_sections(page_key: str, sections: list) -> list:
+    """Sections with links to other pages' markdown sources pointed at their routes."""
+    result = []
+    for section in sections:
+        if section.kind == Section.COMMAND:
+            result.append(section)
+            continue
+        text = section.value
+        rewritten = rewrite_source_links(page_key, text)
+        if rewritten is text:
+            result.append(section)
+        else:
+            result.append(Section(section.kind, rewritten, 0, len(rewritten), level=section.level, anchor=section.anchor))
+    return result
+
+def get_prerender_mode(config) -> bool:
+    """Whether markdown is rendered to HTML at build time ($BURIDAN_PRERENDER or `prerender_markdown` in config.yml)."""
+    enabled = config_flag(config, "prerender_markdown", "BURIDAN_PRERENDER", False)
+    if enabled and not prerender_available():
+        logger.warning("[export] prerender_markdown needs markdown-it-py, falling back to rx.markdown")
+        return False
+    return enabled
+
+def get_highlight_mode(config) -> bool:
+    """Whether code is highlighted at build time ($BURIDAN_HIGHLIGHT or `highlight_code` in config.yml)."""
+    enabled = config_flag(config, "highlight_code", "BURIDAN_HIGHLIGHT", False)
+    if enabled and not highlight_available():
+        logger.warning("[export] highlight_code needs Pygments, leaving highlighting to the browser")
+        return False
+    return enabled
+
+def link_highlight_stylesheet(app, base_path: Path, style: str, read_only: bool) -> bool:
+    """Write assets/buridan/highlight.css next to the app folder and add it to the app's stylesheets."""
+    assets_dir = base_path.parent / "assets"
+    if read_only:
+        if not (assets_dir / STYLESHEET_PATH).exists():
+            logger.warning(f"[export] Read-only mode: {STYLESHEET_PATH} missing from {assets_dir}, highlighted code will be unstyled")
+            return False
+    else:
+        try:
+            write_stylesheet(assets_dir, style)
+        except Exception as e:
+            logger.warning(f"[export] Could not write the {style!r} highlight stylesheet: {e}")
+            return False
+    stylesheets = getattr(app, "stylesheets", None)
+    href = f"/{STYLESHEET_PATH}"
+    if stylesheets is not None and href not in stylesheets:
+        stylesheets.append(href)
+    return True
+
+def get_chunk_mode(config) -> bool:
+    """Whether long pages are split into lazily rendered chunks ($BURIDAN_CHUNK_PAGES or `chunk_pages` in config.yml)."""
+    return config_flag(config, "chunk_pages", "BURIDAN_CHUNK_PAGES", False)
+
+def get_check_mode(config) -> bool:
+    """Whether links, nav entries and TOC anchors are checked ($BURIDAN_CHECK_LINKS or `check_links` in config.yml)."""
+    return config_flag(config, "check_links", "BURIDAN_CHECK_LINKS", True)
+
+def get_prefetch_mode(config) -> bool:
+    """Whether pages prefetch their nav neighbors ($BURIDAN_PREFETCH or `prefetch` in config.yml)."""
+    return config_flag(config, "prefetch", "BURIDAN_PREFETCH", True)
+
+def get_shared_layout_mode(config) -> bool:
+    """Whether the navbar, sidebars and TOC are compiled once as shared components ($BURIDAN_SHARED_LAYOUT or `shared_layout` in config.yml)."""
+    enabled = config_flag(config, "shared_layout", "BURIDAN_SHARED_LAYOUT", True)
+    if enabled and not shared_layout_available():
+        logger.warning("[export] shared_layout needs reflex's rx.memo registry, which this reflex version lacks; inlining the layout")
+        return False
+    return enabled
+
+def prefetch_candidates(page_key: str, nav_tree: NavTree, route_sizes: dict, max_bytes: int) -> list:
+    """Next/previous page of the section, then the main nav targets, while their estimated size fits `max_bytes`.
+
+    A route's size is estimated from its markdown, which is what most of
+    its compiled code is made of.
+    """
+    own = route_for(page_key)
+    routes = []
+    total = 0
+    for route in nav_tree.neighbors(page_key) + [item["url"] for item in nav_tree.main_nav()]:
+        size = route_sizes.get(route)
+        if route == own or route in routes or size is None or total + size > max_bytes:
+            continue
+        routes.append(route)
+        total += size
+    return routes
+
+def page_title(page_key: str, nav_tree: NavTree, toc: list) -> str:
+    """Nav title of a page, else its first heading, else its file name."""
+    node = nav_tree.by_file.get(page_key)
+    if node is not None:
+        return node.title
+    if toc:
+        return toc[0]["text"]
+    return Path(page_key).stem.replace("_", " ").replace("-", " ").capitalize()
+
+def get_lazy_mode(config) -> bool:
+    """Whether pages are parsed on first evaluation ($BURIDAN_LAZY or `lazy_pages` in config.yml)."""
+    return config_flag(config, "lazy_pages", "BURIDAN_LAZY", False)
+
+def get_parallel_workers(config) -> int:
+    """Worker count from $BURIDAN_PARALLEL or `parallel` in config.yml (0/1 = sequential, "auto" = all cores)."""
+    value = os.environ.get("BURIDAN_PARALLEL", config.get("parallel", 0))
+    if str(value).lower() == "auto":
+        return os.cpu_count() or 1
+    try:
+        return max(int(value), 0)
+    except (TypeError, ValueError):
+        logger.warning(f"[export] Ignoring invalid parallel setting: {value!r}")
+        return 0
+
+def parse_pages(md_files: list, workers: int) -> list:
+    """`parse_page_with_stats` for each page, in a process pool when `workers` > 1.
+
+    Results keep the order of `md_files`.
+    """
+    if workers <= 1 or len(md_files) <= 1:
+        return [parse_page_with_stats(md_file) for md_file in md_files]
+
+    workers = min(workers, len(md_files))
+    chunksize = max(1, len(md_files) // (workers * 4))
+    logger.info(f"[export] Parsing {len(md_files)} page(s) with {workers} workers")
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(parse_page_with_stats, md_files, chunksize=chunksize))
+
+def profile_page(target: str, site_index: SiteIndex, cache_dir: Path, render_sections, make_page):
+    """Rebuild one page (by path under pages/ or by route) under cProfile, template evaluation included."""
+    for entry in site_index.md_files():
+        md_file, page_key = entry.path, entry.rel
+        if target in (page_key, route_for(page_key)):
+            break
+    else:
+        logger.warning(f"[export] profile_page: no page matches {target!r}")
+        return
+
+    slug = page_key.replace("/", "_").removesuffix(".md")
+    with profiled(cache_dir / f"profile-{slug}.prof"):
+        sections, toc = parse_page(md_file)
+        make_page(page_key, toc, render_sections(md_file, sections))()
+
+def get_report_top(config) -> int:
+    """Number of slowest pages to log after the build ($BURIDAN_REPORT_TOP or `report_top`), 0 for none."""
+    try:
+        return int(os.environ.get("BURIDAN_REPORT_TOP", config.get("report_top", 0)))
+    except (TypeError, ValueError):
+        return 0
+
+def export_app(app: rx.App, base_path: Path | None = None) -> BuildReport | None:
+    """Register a page on `app` for every markdown file under `base_path`/pages (the app folder by default).
+
+    Returns the build's report, or None if there is no config.yml.
+    """
+    base_path = Path(base_path) if base_path else Path(__file__).parent
     config_path = base_path / "config.yml"
 
     if not config_path.exists():
         logger.error(f"[export] config.yml not found at {config_path}")
         return
 
-    with config_path.open("r", encoding="utf-8") as f:
-        config = yaml.safe_load(f) or {}
+    report = BuildReport()
+    # Chrome left over from a previous export (e.g. another site built in this process) isn't compiled into this app.
+    chrome_cache.clear()
+    imported_at_start = block_registry_cache.misses
+    with report.phase("config"):
+        with config_path.open("r", encoding="utf-8") as f:
+            config = yaml.safe_load(f) or {}
 
     site_name = config.get("site_name", "Untitled Site")
     logger.info(f"[export] Building site: {site_name}")
@@ -145,8 +243,13 @@ def export_app(app: rx.App):
     logger.info(f"[export] Navigation structure: {nav}")
     logger.info(f"[export] Excluding from nav: {exclude_files}")
 
+    read_only = get_read_only(config)
+    if read_only:
+        logger.info("[export] Read-only mode: nothing will be written under the app folder")
+
     pages_dir = base_path / "pages"
-    pages_dir.mkdir(exist_ok=True)
+    if not read_only:
+        pages_dir.mkdir(exist_ok=True)
 
     def create_page(file_path_parts):
         target_path = pages_dir.joinpath(*file_path_parts)
@@ -155,49 +258,25 @@ def export_app(app: rx.App):
             target_path.write_text(f"# {target_path.stem}\n", encoding="utf-8")
             logger.info(f"[export] Created page: {target_path.relative_to(base_path)}")
 
-    def process_nav(nav_list, base_parts=None):
-        base_parts = base_parts or []
-
-        for item in nav_list:
-            if isinstance(item, dict):
-                for title, value in item.items():
-                    if isinstance(value, list):
-                        folder_name = title.lower().replace(" ", "_")
-                        create_page(base_parts + [folder_name, "index.md"])
-                        process_nav(value, base_parts + [folder_name])
-                    elif isinstance(value, str):
-                        create_page(base_parts + [value])
-                    else:
-                        logger.warning(f"[export] Unexpected nav value type {type(value)} for {title}")
-            elif isinstance(item, str):
-                create_page(base_parts + [item])
-            else:
-                logger.warning(f"[export] Unexpected nav item type {type(item)}: {item}")
-
-    create_page(["index.md"])
-    process_nav(nav)
+    with report.phase("nav"):
+        nav_tree = NavTree.compile(nav, exclude_files)
 
-    _clean_nav = clean_nav(nav, exclude_files)
-    main_nav = build_main_nav(nav)
+        if not read_only:
+            create_page(["index.md"])
+            for node in nav_tree.nodes:
+                create_page(node.file.split("/"))
 
-    # Collect all markdown files in pages_dir relative to pages_dir
-    all_md_files = set(str(p.relative_to(pages_dir)).replace("\\", "/") for p in pages_dir.rglob("*.md"))
-    # Collect all referenced files from nav config
-    nav_md_files = flatten_nav(nav)
-    # Orphan files = actual files - referenced in nav
-    orphan_files = all_md_files - nav_md_files
+        main_nav = nav_tree.main_nav()
 
-    # Filter out index.md files inside nav folders from orphan_files
-    filtered_orphans = set()
-    for orphan in orphan_files:
-        path_obj = Path(orphan)
-        if path_obj.name == "index.md":
-            parent_slug = path_obj.parent.name.replace("_", "-").lower()
-            if parent_slug in _clean_nav:
-                continue
-        filtered_orphans.add(orphan)
+    # One scandir pass over pages/; every later stage queries this index instead of the filesystem.
+    with report.phase("scan"):
+        site_index = SiteIndex.scan(pages_dir)
+        md_entries = site_index.md_files()
+    report.count("pages", len(md_entries))
 
-    orphan_files = filtered_orphans
+    with report.phase("orphans"):
+        # Orphan files = markdown files under pages/ that the nav doesn't reference
+        orphan_files = set(site_index.pages) - nav_tree.files()
 
     if orphan_files:
         formatted_orphans = "\n  - " + "\n  - ".join(sorted(orphan_files))
@@ -205,50 +284,261 @@ def export_app(app: rx.App):
     else:
         logger.info("[export] No orphan markdown files found.")
 
-    for md_file in pages_dir.rglob("*.md"):
-        ensure_blocks_folder_for_page(md_file)
-
-        blocks_folder = md_file.parent / "blocks"
-        components_registry = load_components_from_blocks(blocks_folder)
-
-        parser = DelimiterParser(components_registry)
-        content = md_file.read_text(encoding="utf-8")
-        toc = extract_toc(content)
-        parsed_components = parser.parse_and_render(content)
-
-        rel_parts = md_file.with_suffix("").relative_to(pages_dir).parts
-        first_part = rel_parts[0].replace("_", "-")
+    prerender = get_prerender_mode(config)
+    chunk_pages = get_chunk_mode(config)
+    chunk_bytes = int(config.get("chunk_bytes", CHUNK_BYTES))
+    eager_chunks = int(config.get("eager_chunks", EAGER_CHUNKS))
+    highlight = get_highlight_mode(config)
+    highlight_lines = int(config.get("highlight_max_lines", MAX_HIGHLIGHT_LINES))
+    if highlight:
+        link_highlight_stylesheet(app, base_path, config.get("highlight_style", "default"), read_only)
 
-        if first_part in _clean_nav and _clean_nav[first_part]:
-            sidebar_items = _clean_nav[first_part]
-        else:
-            sidebar_items = {}
-
-        def make_page(parsed_components):
-            @template(
-                site_name=site_name,
-                main_nav=main_nav,
-                sidebar_title=md_file.with_suffix("").relative_to(pages_dir).parts[0].replace("_", "-"),
-                sidebar_items=sidebar_items,
-                toc=toc,
-            )
-            def page():
-                return rx.box(*parsed_components)
-            return page
-
-        page = make_page(parsed_components)
+    # Set once the cache dir is known; lazy builds render without it.
+    html_cache = None
 
-        rel_path = md_file.with_suffix("").relative_to(pages_dir)
-        if md_file.name == "index.md":
-            if len(rel_path.parts) == 1:
-                route = "/"
+    def render_sections(md_file, sections, page_key=None):
+        # Only the block modules defining names this page references get imported.
+        blocks_folder = md_file.parent / "blocks"
+        names = DelimiterParser.referenced_names(sections)
+        sections = link_sections(md_file.relative_to(pages_dir).as_posix(), sections)
+        imported_before = block_registry_cache.misses
+        start = time.perf_counter()
+        with report.phase("blocks"):
+            components_registry = load_components_from_blocks(blocks_folder, names, site_index) if names else {}
+            shown = DelimiterParser.shown_names(sections)
+            block_sources = load_block_sources(blocks_folder, shown, site_index) if shown else {}
+        blocks_s = time.perf_counter() - start
+        with report.phase("render"):
+            parser = DelimiterParser(components_registry, prerender, highlight, highlight_lines, html_cache, block_sources)
+            if chunk_pages:
+                components = render_chunked(parser, sections, chunk_bytes, eager_chunks, chunk_writer)
             else:
-                route = "/" + "/".join(rel_path.parts[:-1]) + "/"
+                components = parser.render(sections)
+        if page_key is not None:
+            report.page(
+                page_key,
+                blocks_s=blocks_s,
+                render_s=time.perf_counter() - start - blocks_s,
+                blocks_imported=block_registry_cache.misses - imported_before,
+                components=len(components),
+            )
+        return components
+
+    # The index is built by full builds only; lazy and read-only builds show an existing one.
+    lazy = get_lazy_mode(config)
+    search_dir = base_path.parent / "assets" / SEARCH_DIR
+    build_search = config.get("search", True) and not lazy and not read_only
+    show_search = build_search or (config.get("search", True) and (search_dir / INDEX_NAME).exists())
+    # Lazily loaded chunk fragments need pre-rendered HTML and a full build to prune stale ones;
+    # otherwise late chunks fall back to content-visibility.
+    chunk_writer = None
+    if chunk_pages and prerender and not lazy and not read_only:
+        chunk_writer = ChunkWriter(base_path.parent / "assets" / CHUNKS_DIR)
+
+    # Routes whose code is prefetched: neighbors of each page as it renders, and nav links on hover.
+    prefetch = get_prefetch_mode(config)
+    prefetch_max_bytes = int(config.get("prefetch_max_bytes", PREFETCH_MAX_BYTES))
+    route_sizes = {route_for(key): entry.size for key, entry in site_index.pages.items()}
+    hover_prefetch = frozenset()
+    if config.get("prefetch_on_hover", False):
+        hover_prefetch = frozenset(route for route, size in route_sizes.items() if size <= prefetch_max_bytes)
+
+    shared_layout = get_shared_layout_mode(config)
+
+    def page_sidebar(page_key):
+        section = nav_tree.section_for(page_key)
+        title = section.slug if section else Path(page_key).parts[0].replace("_", "-")
+        return title, nav_tree.sidebar_items(section)
+
+    def make_page(page_key, toc, parsed_components):
+        sidebar_title, sidebar_items = page_sidebar(page_key)
+
+        @template(
+            site_name=site_name,
+            main_nav=main_nav,
+            sidebar_title=sidebar_title,
+            sidebar_items=sidebar_items,
+            toc=toc,
+            search=show_search,
+            prefetch=prefetch_candidates(page_key, nav_tree, route_sizes, prefetch_max_bytes) if prefetch else (),
+            hover_prefetch=hover_prefetch,
+            shared_layout=shared_layout,
+        )
+        def page():
+            return rx.box(*parsed_components)
+        return page
+
+    def make_lazy_page(md_file, page_key):
+        def page():
+            ensure_blocks_folder_for_page(md_file, read_only=read_only)
+            sections, toc = load_page(md_file)
+            return make_page(page_key, toc, render_sections(md_file, sections))()
+        return page
+
+    # Lazy pages are only parsed when Reflex evaluates them. Compiling the frontend evaluates
+    # every route, so this defers parsing from import time to compile time rather than avoiding it;
+    # it is only skipped by processes that import the app without compiling it.
+    if lazy:
+        logger.info(f"[export] Lazy mode: registering {len(md_entries)} page(s) without parsing them")
+        for entry in md_entries:
+            app.add_page(make_lazy_page(entry.path, entry.rel), route=route_for(entry.rel))
+        logger.info("[export] Done building site!")
+        return report
+
+    cache_dir = get_cache_dir(base_path, config, read_only)
+    build_cache = BuildCache(cache_dir, enabled=config.get("build_cache", True))
+    if prerender:
+        html_cache = HtmlCache(cache_dir, enabled=config.get("build_cache", True))
+    pages = []
+    search_index = SearchIndex() if build_search else None
+
+    with report.phase("cache_lookup"):
+        for entry in md_entries:
+            md_file, page_key = entry.path, entry.rel
+            ensure_blocks_folder_for_page(md_file, site_index, read_only)
+
+            content_hash = build_cache.content_hash(page_key, md_file, entry.mtime_ns, entry.size)
+            pages.append((entry, content_hash, build_cache.lookup(page_key, content_hash)))
+
+    # Only the read/tokenize/TOC step is parallelised; registration stays on this thread.
+    stale = [entry for entry, _, cached in pages if cached is None]
+    with report.phase("parse"):
+        parsed = dict(zip(
+            [entry.rel for entry in stale],
+            parse_pages([entry.path for entry in stale], get_parallel_workers(config)),
+        ))
+    report.count("pages_parsed", len(stale))
+    report.count("pages_cached", len(pages) - len(stale))
+
+    resolved = []
+    for entry, content_hash, cached in pages:
+        page_key = entry.rel
+        if cached is not None:
+            sections = [Section.from_record(record) for record in cached["sections"]]
+            toc = cached["toc"]
         else:
-            route = "/" + "/".join(rel_path.parts)
-
-        route = route.replace("\\", "/").replace("_", "-")
-
-        app.add_page(page, route=route)
-
+            sections, toc, parse_stats = parsed[page_key]
+            report.page(page_key, **parse_stats)
+            report.count("bytes_read", parse_stats["bytes"])
+            names = DelimiterParser.referenced_names(sections)
+            build_cache.store(page_key, content_hash, entry.mtime_ns, entry.size, [section.to_record() for section in sections], toc, names)
+            cached = build_cache.entries[page_key]
+        resolved.append((entry, cached, sections, toc))
+
+    if get_check_mode(config):
+        with report.phase("check"):
+            route_index = RouteIndex(pages_dir, base_path.parent / "assets", config.get("check_links_ignore", []))
+            for entry, _, sections, _ in resolved:
+                route_index.add_page(entry.rel, (section.anchor for section in sections if section.kind == Section.HEADING))
+            # Links are cached with the page, so only changed pages are read again.
+            unscanned = {entry.rel: entry.path for entry, cached, _, _ in resolved if cached.get("links") is None}
+            scanned = scan_pages(unscanned, get_parallel_workers(config) or None)
+            for entry, cached, _, _ in resolved:
+                if entry.rel in scanned:
+                    cached["links"] = scanned[entry.rel]
+            broken = check_nav(route_index, nav_tree, config_path)
+            broken += check_links(route_index, {entry.rel: cached["links"] for entry, cached, _, _ in resolved})
+            for entry, _, _, toc in resolved:
+                broken += check_toc(route_index, entry.rel, toc, entry.path)
+        log_broken(broken, len(resolved))
+        report.count("links_scanned", len(scanned))
+        report.count("broken_links", len(broken))
+
+    # Images are processed for the whole site at once so the worker pool sees every image.
+    image_pipeline = None
+    if config.get("optimize_images", True) and not read_only:
+        with report.phase("images"):
+            image_pipeline = ImagePipeline(
+                pages_dir,
+                base_path.parent / "assets" / IMAGES_DIR,
+                cache_dir,
+                config.get("image_widths", IMAGE_WIDTHS),
+                int(config.get("image_quality", IMAGE_QUALITY)),
+            )
+            for entry, _, sections, _ in resolved:
+                image_pipeline.collect(entry.path, sections)
+            image_pipeline.process(get_parallel_workers(config))
+            image_pipeline.finish()
+        report.count("images", len(image_pipeline.images))
+
+    for entry, cached, sections, toc in resolved:
+        md_file, page_key = entry.path, entry.rel
+        if search_index is not None:
+            with report.phase("search"):
+                # Terms are cached with the page, so unchanged pages skip text extraction.
+                if cached.get("terms") is None:
+                    cached["terms"] = page_terms(sections)
+                search_index.add(route_for(page_key), page_title(page_key, nav_tree, toc), cached["terms"])
+
+        if image_pipeline is not None:
+            sections = image_pipeline.rewrite(md_file, sections)
+        parsed_components = render_sections(md_file, sections, page_key)
+        report.count("components", len(parsed_components))
+
+        start = time.perf_counter()
+        with report.phase("templates"):
+            page = make_page(page_key, toc, parsed_components)
+            if shared_layout:
+                saved = chrome_cache.bytes_saved(site_name, main_nav, *page_sidebar(page_key), toc, show_search, hover_prefetch)
+                report.page(page_key, layout_bytes_saved=saved)
+                report.count("layout_bytes_saved", saved)
+        with report.phase("add_page"):
+            app.add_page(page, route=route_for(page_key))
+        report.page(page_key, register_s=time.perf_counter() - start)
+
+    with report.phase("cache_save"):
+        build_cache.save()
+        if html_cache is not None:
+            html_cache.save()
+    if html_cache is not None:
+        report.count("html_cached", html_cache.hits)
+
+    if chunk_writer is not None:
+        chunk_writer.finish()
+        report.count("lazy_chunks", len(chunk_writer.used))
+
+    if search_index is not None:
+        with report.phase("search"):
+            search_stats = search_index.write(search_dir)
+        report.count("search_terms", search_stats["terms"])
+        report.count("search_bytes", search_stats["bytes"])
+
+    if shared_layout:
+        chrome = chrome_cache.stats()
+        report.detail("layout", {"shared": chrome["shared"], "shared_bytes": chrome["shared_bytes"], "bytes_saved": report.counters["layout_bytes_saved"]})
+        logger.info(
+            f"[export] Shared layout: {chrome['shared']} navbar/sidebar component(s) ({chrome['shared_bytes']} bytes) compiled once, "
+            f"{report.counters['layout_bytes_saved']} rendered bytes saved across {len(resolved)} route(s)"
+        )
+
+    stats = block_registry_cache.stats()
+    report.count("blocks_imported", stats["misses"] - imported_at_start)
+    logger.info(f"[export] Block registry cache: {stats['hits']} hit(s), {stats['misses']} miss(es)")
+    block_folders = block_registry_cache.report(pages_dir)
+    report.detail("blocks", block_folders)
+    report.count("block_collisions", sum(len(folder["collisions"]) for folder in block_folders.values()))
+    logger.info(
+        f"[export] Block registry: {sum(folder['blocks'] for folder in block_folders.values())} block(s) indexed in "
+        f"{len(block_folders)} folder(s), {sum(folder['loaded'] for folder in block_folders.values())} loaded, "
+        f"{sum(folder['bytes'] for folder in block_folders.values())} bytes"
+    )
+    sources = source_cache_info()
+    logger.info(f"[export] Block source cache: {sources.hits} hit(s), {sources.misses} miss(es)")
+    if prerender:
+        html = markdown_to_html.cache_info()
+        logger.info(f"[export] Markdown HTML cache: {html.hits} hit(s), {html.misses} miss(es)")
+    if highlight:
+        snippets = highlight_cache_info()
+        logger.info(f"[export] Highlight cache: {snippets.hits} hit(s), {snippets.misses} miss(es)")
+
+    profile_target = os.environ.get("BURIDAN_PROFILE_PAGE", config.get("profile_page"))
+    if profile_target:
+        profile_page(profile_target, site_index, cache_dir, render_sections, make_page)
+
+    if config.get("build_report", True):
+        report.write(cache_dir / REPORT_NAME)
+    top = get_report_top(config)
+    if top:
+        logger.info(f"[export] Build summary:\n{report.summary(top)}")
     logger.info("[export] Done building site!")
+    return report
@@ -0,0 +1,76 @@
+import functools
+import html
+import logging
+from pathlib import Path
+
+from .settings import GENERATED_DIR
+
+try:
+    from pygments import highlight as _pygments_highlight
+    from pygments.formatters import HtmlFormatter
+    from pygments.lexers import get_lexer_by_name
+    from pygments.lexers.special import TextLexer
+    from pygments.util import ClassNotFound
+except ImportError:  # Build-time highlighting is optional; code is left to the browser without it.
+    HtmlFormatter = None
+
+logger = logging.getLogger(__name__)
+
+CSS_CLASS = "highlight"
+STYLESHEET_NAME = "highlight.css"
+# Relative to the assets folder, which is also the URL path it is served under.
+STYLESHEET_PATH = f"{GENERATED_DIR}/{STYLESHEET_NAME}"
+# Highlighted snippets kept in memory, keyed by their code and language.
+HIGHLIGHT_CACHE_SIZE = 1024
+# Code longer than this is collapsed into a <details> element and not tokenized.
+MAX_HIGHLIGHT_LINES = 1000
+
+
+def highlight_available() -> bool:
+    return HtmlFormatter is not None
+
+
+@functools.lru_cache(maxsize=HIGHLIGHT_CACHE_SIZE)
+def _highlight(code: str, language: str) -> str:
+    try:
+        lexer = get_lexer_by_name(language) if language else TextLexer()
+    except ClassNotFound:
+        lexer = TextLexer()
+    return _pygments_highlight(code, lexer, HtmlFormatter(nowrap=True))
+
+
+def highlight_html(code: str, language: str = "", max_lines: int = MAX_HIGHLIGHT_LINES, title: str | None = None) -> str:
+    """Code as pre-tokenized `<pre class="highlight">` markup styled by the shared stylesheet.
+
+    Snippets over `max_lines` are escaped without tokenizing and wrapped in a
+    collapsed <details> element.
+    """
+    language = language.strip().split(maxsplit=1)[0] if language.strip() else ""
+    lines = code.count("\n") + (0 if code.endswith("\n") else 1)
+    code_class = f' class="language-{html.escape(language)}"' if language else ""
+    if max_lines and lines > max_lines:
+        label = html.escape(title or language or "code")
+        return (
+            f'<details class="{CSS_CLASS}-collapsed"><summary>{label} ({lines} lines)</summary>'
+            f'<pre class="{CSS_CLASS}"><code{code_class}>{html.escape(code)}</code></pre></details>\n'
+        )
+    return f'<pre class="{CSS_CLASS}"><code{code_class}>{_highlight(code, language)}</code></pre>\n'
+
+
+def highlight_cache_info():
+    return _highlight.cache_info()
+
+
+def write_stylesheet(assets_dir: Path, style: str = "default") -> Path:
+    """Write the token styles shared by every highlighted snippet, only if they changed."""
+    path = assets_dir / STYLESHEET_PATH
+    css = HtmlFormatter(style=style).get_style_defs(f".{CSS_CLASS}")
+    try:
+        if path.read_text(encoding="utf-8") == css:
+            return path
+    except OSError:
+        pass
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(css, encoding="utf-8")
+    logger.info(f"[highlight] Wrote {style!r} stylesheet to {path}")
+    return path
@@ -0,0 +1,254 @@
+import hashlib
+import html
+import json
+import logging
+import os
+import re
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+try:
+    from PIL import Image
+except ImportError:  # Without Pillow, images are copied as-is and only get loading="lazy".
+    Image = None
+
+# Errors that skip a single image: unreadable or unidentified files (say, a
+# Git LFS pointer saved as .png) and decompression bombs.
+IMAGE_ERRORS = (OSError,) if Image is None else (OSError, Image.DecompressionBombError)
+
+from .parser import Section
+from .settings import GENERATED_DIR
+
+logger = logging.getLogger(__name__)
+
+IMAGES_DIR = f"{GENERATED_DIR}/images"
+CACHE_DIR_NAME = "images"
+INDEX_NAME = "images.json"
+IMAGE_WIDTHS = (480, 960, 1440)
+IMAGE_QUALITY = 80
+IMAGE_SIZES = "(max-width: 1024px) 100vw, 800px"
+# Formats that get resized variants plus a WebP version; anything else is copied unchanged.
+RESIZABLE_SUFFIXES = {".png", ".jpg", ".jpeg", ".webp"}
+IMAGE_SUFFIXES = RESIZABLE_SUFFIXES | {".gif", ".svg", ".avif"}
+
+IMAGE_RE = re.compile(r'!\[(?P<alt>[^\]]*)\]\((?P<src>[^)\s]+)(?:\s+"(?P<title>[^"]*)")?\)')
+FENCE_RE = re.compile(r"^ {0,3}(`{3,}|~{3,}).*?^ {0,3}\1[ \t]*$", re.MULTILINE | re.DOTALL)
+
+
+def is_local(src: str) -> bool:
+    return not (src.startswith(("/", "#", "data:")) or "://" in src)
+
+
+def iter_images(text: str):
+    """Markdown image matches outside fenced code blocks."""
+    fences = [match.span() for match in FENCE_RE.finditer(text)]
+    for match in IMAGE_RE.finditer(text):
+        if not any(start <= match.start() < end for start, end in fences):
+            yield match
+
+
+def optimize_image(path: str, digest: str, out_dir: str, widths: tuple, quality: int) -> dict:
+    """Write the variants of one image under `out_dir` and describe them, or return {"error": ...}.
+
+    May run in a worker process, so errors are returned rather than raised
+    and one bad image doesn't fail the others.
+    """
+    try:
+        return _optimize_image(Path(path), digest, Path(out_dir), widths, quality)
+    except IMAGE_ERRORS as e:
+        return {"error": f"{type(e).__name__}: {e}"}
+
+
+def _optimize_image(source: Path, digest: str, out: Path, widths: tuple, quality: int) -> dict:
+    name = digest[:16]
+    suffix = source.suffix.lower()
+    info = {"width": None, "height": None, "src": None, "srcset": [], "webp": []}
+
+    if Image is None or suffix not in RESIZABLE_SUFFIXES:
+        target = out / f"{name}{suffix}"
+        if not target.exists():
+            shutil.copyfile(source, target)
+        info["src"] = target.name
+        if Image is not None and suffix != ".svg":
+            with Image.open(source) as image:
+                info["width"], info["height"] = image.size
+        return info
+
+    with Image.open(source) as image:
+        image.load()
+        info["width"], info["height"] = image.size
+        fallback = "JPEG" if suffix in (".jpg", ".jpeg") else "PNG"
+        ext = ".jpg" if fallback == "JPEG" else ".png"
+        sizes = sorted({w for w in widths if w < image.width} | {image.width})
+        for width in sizes:
+            height = round(image.height * width / image.width)
+            resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+            for fmt, file_ext, key in ((fallback, ext, "srcset"), ("WEBP", ".webp", "webp")):
+                target = out / f"{width}-{name}{file_ext}"
+                if not target.exists():
+                    converted = resized.convert("RGB") if fmt == "JPEG" and resized.mode not in ("RGB", "L") else resized
+                    converted.save(target, fmt, quality=quality, optimize=True)
+                info[key].append([width, target.name])
+        info["src"] = info["srcset"][-1][1]
+    return info
+
+
+class ImagePipeline:
+    """Finds page-local images referenced from markdown and builds optimized variants.
+
+    Variants are named by the hash of the source image and written to
+    assets/buridan/images/. The description of each processed image is kept in the
+    cache dir, keyed by that hash and the resize settings, so unchanged
+    images are never reprocessed. Source hashes are trusted while a file's
+    mtime and size are unchanged.
+    """
+
+    def __init__(self, pages_dir: Path, out_dir: Path, cache_dir: Path, widths=IMAGE_WIDTHS, quality: int = IMAGE_QUALITY):
+        self.pages_dir = pages_dir
+        self.out_dir = out_dir
+        self.cache_dir = cache_dir / CACHE_DIR_NAME
+        self.widths = tuple(sorted(widths))
+        self.quality = quality
+        self.settings = hashlib.sha256(json.dumps([self.widths, quality, Image is not None]).encode()).hexdigest()[:8]
+        self.sources = {}
+        self.images = {}
+        self.index = {}
+        self.processed = 0
+        self.failed = 0
+        try:
+            self.index = json.loads((self.cache_dir / INDEX_NAME).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            pass
+
+    def collect(self, md_file: Path, sections: list):
+        for section in sections:
+            if section.kind != Section.CONTENT or "![" not in section.value:
+                continue
+            for match in iter_images(section.value):
+                src = match.group("src")
+                if not is_local(src) or Path(src).suffix.lower() not in IMAGE_SUFFIXES:
+                    continue
+                path = (md_file.parent / src).resolve()
+                if path.is_file() and path.is_relative_to(self.pages_dir.resolve()):
+                    self.sources[str(path)] = path
+                else:
+                    logger.warning(f"[images] {md_file.relative_to(self.pages_dir)}: image not found: {src}")
+
+    def _digest(self, path: Path) -> str:
+        stat = path.stat()
+        entry = self.index.get(str(path))
+        if entry and entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+            return entry["hash"]
+        digest = hashlib.sha256(path.read_bytes()).hexdigest()
+        self.index[str(path)] = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "hash": digest}
+        return digest
+
+    def process(self, workers: int = 1):
+        """Build variants of every collected image that isn't in the cache yet, in a process pool when `workers` > 1."""
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        # Identical files referenced from several places are processed once.
+        by_digest = {}
+        for key, path in self.sources.items():
+            by_digest.setdefault(self._digest(path), []).append((key, path))
+
+        pending = []
+        for digest, sources in by_digest.items():
+            meta_path = self.cache_dir / f"{digest[:16]}-{self.settings}.json"
+            try:
+                info = json.loads(meta_path.read_text(encoding="utf-8"))
+                if all((self.out_dir / name).exists() for name in self._files(info)):
+                    self.images.update((key, info) for key, _ in sources)
+                    continue
+            except (OSError, ValueError):
+                pass
+            pending.append((digest, sources, meta_path))
+
+        if pending:
+            args = [(str(sources[0][1]), digest, str(self.out_dir), self.widths, self.quality) for digest, sources, _ in pending]
+            if workers > 1 and len(pending) > 1:
+                with ProcessPoolExecutor(max_workers=min(workers, len(pending))) as executor:
+                    results = list(executor.map(optimize_image, *zip(*args)))
+            else:
+                results = [optimize_image(*arg) for arg in args]
+            for (_, sources, meta_path), info in zip(pending, results):
+                if "error" in info:
+                    # Left out of `images`, so the markdown referencing it is kept as is.
+                    logger.warning(f"[images] Skipping {sources[0][1].relative_to(self.pages_dir.resolve())}: {info['error']}")
+                    self.failed += 1
+                    continue
+                meta_path.write_text(json.dumps(info), encoding="utf-8")
+                self.images.update((key, info) for key, _ in sources)
+                self.processed += 1
+
+        if Image is None and self.sources:
+            logger.warning("[images] Pillow is not installed, images are copied without resizing")
+        cached = len(by_digest) - len(pending)
+        logger.info(f"[images] {len(by_digest)} image(s), {self.processed} processed, {cached} cached, {self.failed} skipped")
+
+    @staticmethod
+    def _files(info: dict) -> set:
+        return {info["src"]} | {name for _, name in info["srcset"] + info["webp"]}
+
+    def _html(self, info: dict, alt: str, title: str | None) -> str:
+        def url(name):
+            return f"/{IMAGES_DIR}/{name}"
+
+        def srcset(variants):
+            return ", ".join(f"{url(name)} {width}w" for width, name in variants)
+
+        attrs = [f'src="{url(info["src"])}"', f'alt="{html.escape(alt)}"']
+        if title:
+            attrs.append(f'title="{html.escape(title)}"')
+        if info["srcset"]:
+            attrs += [f'srcset="{srcset(info["srcset"])}"', f'sizes="{IMAGE_SIZES}"']
+        if info["width"]:
+            attrs += [f'width="{info["width"]}"', f'height="{info["height"]}"']
+        attrs += ['loading="lazy"', 'decoding="async"', 'style="max-width:100%;height:auto"']
+        img = f"<img {' '.join(attrs)}>"
+        if not info["webp"]:
+            return img
+        return f'<picture><source type="image/webp" srcset="{srcset(info["webp"])}" sizes="{IMAGE_SIZES}">{img}</picture>'
+
+    def rewrite(self, md_file: Path, sections: list) -> list:
+        """Sections with local markdown images replaced by <picture>/<img> markup."""
+        result = []
+        for section in sections:
+            if section.kind != Section.CONTENT or "![" not in section.value:
+                result.append(section)
+                continue
+            text = section.value
+            parts = []
+            last = 0
+            for match in iter_images(text):
+                info = self.images.get(str((md_file.parent / match.group("src")).resolve()))
+                if info is None:
+                    continue
+                parts += [text[last:match.start()], self._html(info, match.group("alt"), match.group("title"))]
+                last = match.end()
+            if not parts:
+                result.append(section)
+                continue
+            parts.append(text[last:])
+            value = "".join(parts)
+            result.append(Section(Section.CONTENT, value, 0, len(value)))
+        return result
+
+    def finish(self):
+        """Save the source hashes and delete variants no page uses anymore."""
+        used = set()
+        for info in self.images.values():
+            used |= self._files(info)
+        if self.out_dir.is_dir():
+            for path in self.out_dir.iterdir():
+                if path.name not in used and path.is_file():
+                    path.unlink()
+        current = {f"{entry['hash'][:16]}-{self.settings}.json" for key, entry in self.index.items() if key in self.sources}
+        for path in self.cache_dir.glob("*-*.json"):
+            if path.name not in current:
+                path.unlink()
+        self.index = {key: entry for key, entry in self.index.items() if key in self.sources}
+        tmp_path = self.cache_dir / f"{INDEX_NAME}.{os.getpid()}.tmp.json"
+        tmp_path.write_text(json.dumps(self.index), encoding="utf-8")
+        tmp_path.replace(self.cache_dir / INDEX_NAME)
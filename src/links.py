@@ -0,0 +1,321 @@
+import logging
+import os
+import posixpath
+import re
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import unquote
+
+from .markup import fence_spans, has_fences, in_spans, iter_headings, unique_anchor
+from .nav import NavTree, route_for
+from .scan import SiteIndex
+
+logger = logging.getLogger(__name__)
+
+# Every pattern starts with a literal so candidates are found with a fast substring search;
+# images are left to images.py.
+LINK_RE = re.compile(r"\](?:\(\s*<?(?P<inline>[^)\s>]*)|:[ \t]*<?(?P<ref>[^\s>]+))")
+HREF_RE = re.compile(r'href="(?P<href>[^"]*)"')
+REF_START_RE = re.compile(r" {0,3}\[(?!\^)[^\]\n]+")
+INLINE_CODE_RE = re.compile(r"`[^`\n]+`")
+EXTERNAL_RE = re.compile(r"^(?:[a-zA-Z][a-zA-Z0-9+.-]*:|//)")
+# Anchors browsers resolve on every page.
+BUILTIN_ANCHORS = frozenset(("", "top"))
+PAGE_SUFFIXES = ("", ".md", ".html")
+
+
+def code_spans(text: str) -> list:
+    """Sorted, non-overlapping (start, end) of fenced code blocks and inline code spans."""
+    spans = fence_spans(text) + [match.span() for match in INLINE_CODE_RE.finditer(text)]
+    merged = []
+    for start, end in sorted(spans):
+        if merged and start < merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(end, merged[-1][1]))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def has_code(text: str) -> bool:
+    return "`" in text or has_fences(text)
+
+
+def page_anchors(text: str, code: list | None = None) -> list:
+    """Anchors of a page's h1/h2 headings, as `iter_sections` assigns them, without tokenizing the rest."""
+    if code is None:
+        code = code_spans(text) if has_code(text) else []
+    used = set()
+    return [
+        unique_anchor(text[text_start:text_end].strip(), used)
+        for _, _, _, text_start, text_end in iter_headings(text, code)
+    ]
+
+
+def find_targets(text: str) -> list:
+    """((start, end), target) of every link target in `text`, code included, images left out."""
+    found = []
+    for match in LINK_RE.finditer(text):
+        if match.group("inline") is not None:
+            opening = text.rfind("[", 0, match.start())
+            if opening > 0 and text[opening - 1] == "!":
+                continue
+            found.append((match.span("inline"), match.group("inline")))
+        else:
+            line_start = text.rfind("\n", 0, match.start()) + 1
+            if REF_START_RE.fullmatch(text, line_start, match.start()):
+                found.append((match.span("ref"), match.group("ref")))
+    if "href=" in text:
+        found += [(match.span("href"), match.group("href")) for match in HREF_RE.finditer(text)]
+    return found
+
+
+def scan_links(text: str, code: list | None = None) -> list:
+    """[line, target] of every link in a page outside code, in document order."""
+    found = find_targets(text)
+    if not found:
+        return []
+
+    if code is None:
+        code = code_spans(text) if has_code(text) else []
+    starts = [start for start, _ in code]
+    links = []
+    line, pos = 1, 0
+    for (start, _), target in sorted(found):
+        if not target or in_spans(code, starts, start):
+            continue
+        line += text.count("\n", pos, start)
+        pos = start
+        links.append([line, target])
+    return links
+
+
+def source_page_key(page_key: str, path: str) -> str:
+    """Page a link to a markdown source names: relative to the linking page, or to pages/ with a leading /."""
+    if path.startswith("/"):
+        return path.lstrip("/")
+    return posixpath.normpath(posixpath.join(posixpath.dirname(page_key), path))
+
+
+def source_href(page_key: str, target: str) -> str | None:
+    """Route (and anchor) a link to another page's markdown source stands for; None for any other link."""
+    if EXTERNAL_RE.match(target):
+        return None
+    path, hash_sign, anchor = target.partition("#")
+    path = unquote(path.split("?", 1)[0])
+    if not path.lower().endswith(".md"):
+        return None
+    return route_for(source_page_key(page_key, path)) + hash_sign + anchor
+
+
+def rewrite_source_links(page_key: str, text: str) -> str:
+    """`text` with links to markdown sources (`install.md#setup`) pointed at the routes their pages are served at.
+
+    Returns `text` itself when there is nothing to rewrite.
+    """
+    if ".md" not in text:
+        return text
+    found = []
+    for span, target in find_targets(text):
+        href = source_href(page_key, target.strip())
+        if href is not None:
+            found.append((span, href))
+    if not found:
+        return text
+    code = code_spans(text) if has_code(text) else []
+    starts = [start for start, _ in code]
+    parts = []
+    last = 0
+    for (start, end), href in sorted(found):
+        if in_spans(code, starts, start):
+            continue
+        parts += [text[last:start], href]
+        last = end
+    if not parts:
+        return text
+    parts.append(text[last:])
+    return "".join(parts)
+
+
+def scan_file(path: Path) -> list:
+    return scan_links(path.read_text(encoding="utf-8"))
+
+
+def normalize_route(route: str) -> str:
+    return route.rstrip("/") or "/"
+
+
+class BrokenLink:
+    """A link that doesn't resolve, with where it was found."""
+
+    __slots__ = ("file", "line", "target", "reason")
+
+    def __init__(self, file: str, line: int | None, target: str, reason: str):
+        self.file = file
+        self.line = line
+        self.target = target
+        self.reason = reason
+
+    def __str__(self):
+        where = f"{self.file}:{self.line}" if self.line else self.file
+        return f"{where}: {self.target} ({self.reason})"
+
+
+class RouteIndex:
+    """Every route the site serves and the heading anchors on each page.
+
+    Routes come from `route_for`, the same function pages are registered
+    with, so each link is checked with a dict lookup. Links to files with
+    another suffix are checked against pages/ (relative) or assets/
+    (absolute), and each file is only looked up once.
+    """
+
+    def __init__(self, pages_dir: Path, assets_dir: Path, ignore=()):
+        self.pages_dir = pages_dir
+        self.assets_dir = assets_dir
+        self.ignore = tuple(normalize_route(prefix) for prefix in ignore)
+        self.routes = {}
+        self.anchors = {}
+        self.files = {}
+
+    def add_page(self, page_key: str, anchors):
+        route = route_for(page_key)
+        self.routes[page_key] = route
+        self.anchors[normalize_route(route)] = set(anchors)
+
+    def has_route(self, route: str) -> bool:
+        return normalize_route(route) in self.anchors
+
+    def _file_exists(self, path: Path) -> bool:
+        key = str(path)
+        if key not in self.files:
+            self.files[key] = path.is_file()
+        return self.files[key]
+
+    def resolve(self, page_key: str, target: str) -> str | None:
+        """Why `target`, linked from `page_key`, is broken; None when it resolves."""
+        target = unquote(target.strip())
+        if EXTERNAL_RE.match(target):
+            return None
+        path, _, anchor = target.partition("#")
+        path = path.split("?", 1)[0]
+        suffix = posixpath.splitext(path.rsplit("/", 1)[-1])[1].lower()
+
+        if not path:
+            route = self.routes[page_key]
+        elif suffix == ".md":
+            # Links to the markdown source of another page; rewrite_source_links points them at its route.
+            key = source_page_key(page_key, path)
+            route = self.routes.get(key)
+            if route is None:
+                return f"no page at pages/{key}"
+        elif suffix not in PAGE_SUFFIXES:
+            if path.startswith("/"):
+                exists = self._file_exists(self.assets_dir / path.lstrip("/"))
+            else:
+                exists = self._file_exists(self.pages_dir / posixpath.dirname(page_key) / path)
+            return None if exists else "file not found"
+        elif path.startswith("/"):
+            route = path
+        else:
+            # Resolved like the browser does, against the URL of the linking page.
+            base = self.routes[page_key]
+            base = base if base.endswith("/") else posixpath.dirname(base) + "/"
+            route = posixpath.normpath(posixpath.join(base, path))
+
+        route = normalize_route(route.removesuffix(".html"))
+        if any(route == prefix or route.startswith(prefix.rstrip("/") + "/") for prefix in self.ignore):
+            return None
+        anchors = self.anchors.get(route)
+        if anchors is None:
+            return f"no page at {route}"
+        if anchor not in anchors and anchor not in BUILTIN_ANCHORS:
+            return f"no heading #{anchor} on {route}"
+        return None
+
+
+def _find_line(lines: list, text: str) -> int | None:
+    for number, line in enumerate(lines, 1):
+        if text in line:
+            return number
+    return None
+
+
+def check_nav(index: RouteIndex, nav_tree: NavTree, config_path: Path) -> list:
+    """Navbar and sidebar links that point at routes no page serves."""
+    try:
+        lines = config_path.read_text(encoding="utf-8").splitlines()
+    except OSError:
+        lines = []
+    linked = list(nav_tree.roots)
+    for section in nav_tree.sections():
+        linked += [child for child in section.children if not child.excluded]
+    broken = []
+    for node in linked:
+        if not index.has_route(node.route):
+            line = _find_line(lines, node.value or f"{node.title}:")
+            broken.append(BrokenLink(config_path.name, line, node.route, f"nav entry {node.title!r} has no page at pages/{node.file}"))
+    return broken
+
+
+def check_toc(index: RouteIndex, page_key: str, toc: list, md_file: Path) -> list:
+    """TOC entries whose anchor isn't the id of a heading on the page."""
+    anchors = index.anchors[normalize_route(index.routes[page_key])]
+    missing = [item for item in toc if item["anchor"] not in anchors]
+    if not missing:
+        return []
+    lines = md_file.read_text(encoding="utf-8").splitlines()
+    return [
+        BrokenLink(f"pages/{page_key}", _find_line(lines, item["text"]), f"#{item['anchor']}", "TOC entry without a matching heading")
+        for item in missing
+    ]
+
+
+def check_links(index: RouteIndex, links: dict) -> list:
+    """Resolve {page_key: [[line, target]]} against the index."""
+    broken = []
+    for page_key, page_links in links.items():
+        for line, target in page_links:
+            reason = index.resolve(page_key, target)
+            if reason is not None:
+                broken.append(BrokenLink(f"pages/{page_key}", line, target, reason))
+    return broken
+
+
+def scan_pages(md_files: dict, workers: int | None = None) -> dict:
+    """`scan_file` for {page_key: path}, reading files in a thread pool."""
+    if not md_files:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(workers or os.cpu_count() or 1, len(md_files))) as executor:
+        return dict(zip(md_files, executor.map(scan_file, md_files.values())))
+
+
+def _read_page(path: Path):
+    text = path.read_text(encoding="utf-8")
+    code = code_spans(text) if has_code(text) else []
+    return page_anchors(text, code), scan_links(text, code)
+
+
+def check_site(app_folder: Path, config: dict, workers: int | None = None) -> list:
+    """Check every link of a site without building it: one concurrent read per page."""
+    pages_dir = app_folder / "pages"
+    site_index = SiteIndex.scan(pages_dir)
+    entries = site_index.md_files()
+    index = RouteIndex(pages_dir, app_folder.parent / "assets", config.get("check_links_ignore", []))
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1) as executor:
+        pages = list(executor.map(_read_page, [entry.path for entry in entries]))
+    for entry, (anchors, _) in zip(entries, pages):
+        index.add_page(entry.rel, anchors)
+
+    nav_tree = NavTree.compile(config.get("nav", []), config.get("exclude_from_nav", []))
+    broken = check_nav(index, nav_tree, app_folder / "config.yml")
+    broken += check_links(index, {entry.rel: links for entry, (_, links) in zip(entries, pages)})
+    return broken
+
+
+def log_broken(broken: list, pages: int):
+    for link in broken:
+        logger.warning(f"[links] {link}")
+    if broken:
+        logger.warning(f"[links] {len(broken)} broken link(s) in {pages} page(s)")
+    else:
+        logger.info(f"[links] All links in {pages} page(s) resolve")
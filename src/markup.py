@@ -0,0 +1,118 @@
+import bisect
+import html
+import re
+
+# Line patterns are searched in "\n" + text so that every line, the first one
+# included, starts with a literal the regex engine can scan for.
+FENCE_LINE_RE = re.compile(r"\n {0,3}(?P<marker>`{3,}|~{3,})(?P<info>[^\n]*)")
+HEADING_LINE_RE = re.compile(r"\n(?P<hashes>##?)[ \t]+(?P<text>[^\n]*)")
+# A link reference or footnote definition, with its indented continuation lines.
+DEFINITION_RE = re.compile(r"\n {0,3}\[(?P<label>[^\]\n]+)\]:[^\n]*(?:\n[ \t]+\S[^\n]*)*")
+
+_MARKUP_RE = re.compile(r"[`*_\[<&~\\]")
+_LINK_TEXT_RE = re.compile(r"!?\[([^\]]*)\](?:\([^)]*\)|\[[^\]]*\])?")
+_TAG_RE = re.compile(r"</?[A-Za-z][^>]*>")
+_EMPHASIS_RE = re.compile(r"(`+|\*{1,3}|~~)(?=\S)(.+?)(?<=\S)\1|(?<!\w)(_{1,3})(?=\S)(.+?)(?<=\S)\3(?!\w)")
+_ESCAPE_RE = re.compile(r"\\([!-/:-@\[-`{-~])")
+_SLUG_RE = re.compile(r"[^a-z0-9]+")
+
+
+def has_fences(text: str) -> bool:
+    return "```" in text or "~~~" in text
+
+
+def fence_spans(text: str) -> list:
+    """Sorted (start, end) of the fenced code blocks of a page, fence lines included."""
+    if not has_fences(text):
+        return []
+    spans = []
+    fence = None
+    for match in FENCE_LINE_RE.finditer("\n" + text):
+        marker, info = match.group("marker"), match.group("info")
+        line_start, line_end = match.start(), match.end() - 1
+        if fence is None:
+            # A backtick fence's info string can't contain backticks.
+            if not (marker[0] == "`" and "`" in info):
+                fence = (marker, line_start)
+        elif marker[0] == fence[0][0] and len(marker) >= len(fence[0]) and not info.strip():
+            spans.append((fence[1], line_end))
+            fence = None
+    if fence is not None:
+        # An unclosed fence runs to the end of the page.
+        spans.append((fence[1], len(text)))
+    return spans
+
+
+def in_spans(spans: list, starts: list, pos: int) -> bool:
+    """Whether `pos` falls in one of the sorted, non-overlapping `spans` (`starts` being their start offsets)."""
+    i = bisect.bisect_right(starts, pos) - 1
+    return i >= 0 and pos < spans[i][1]
+
+
+def iter_headings(text: str, fences: list):
+    """(start, end, level, text_start, text_end) of the h1/h2 ATX headings outside `fences`."""
+    starts = [start for start, _ in fences]
+    for match in HEADING_LINE_RE.finditer("\n" + text):
+        # The closing sequence of #s is trimmed here rather than by the regex, which stays greedy.
+        body = match.group("text").rstrip(" \t")
+        closed = body.rstrip("#")
+        if len(closed) < len(body) and (not closed or closed[-1] in " \t"):
+            body = closed.rstrip(" \t")
+        if not body or in_spans(fences, starts, match.start()):
+            continue
+        text_start = match.start("text") - 1
+        yield match.start(), match.end() - 1, len(match.group("hashes")), text_start, text_start + len(body)
+
+
+def definitions(text: str, fences: list) -> list:
+    """(start, end, label, source) of the link reference and footnote definitions outside `fences`.
+
+    Labels are lowercased, as reference lookups ignore case.
+    """
+    if "]:" not in text:
+        return []
+    starts = [start for start, _ in fences]
+    found = []
+    for match in DEFINITION_RE.finditer("\n" + text):
+        if not in_spans(fences, starts, match.start()):
+            found.append((match.start(), match.end() - 1, match.group("label").lower(), match.group().strip()))
+    return found
+
+
+def references_re(found: list) -> re.Pattern | None:
+    """Regex matching a use (`[label]`) of any of the `definitions`, ignoring case; None if there are none."""
+    if not found:
+        return None
+    labels = sorted({label for _, _, label, _ in found}, key=len, reverse=True)
+    return re.compile("|".join(re.escape(f"[{label}]") for label in labels), re.IGNORECASE)
+
+
+def has_markup(text: str) -> bool:
+    """Whether heading text may hold inline markdown (code, emphasis, links, HTML or entities)."""
+    return _MARKUP_RE.search(text) is not None
+
+
+def plain_text(text: str) -> str:
+    """Inline markdown reduced to the text it displays: '[pip](https://pypi.org) `install`' -> 'pip install'."""
+    if not has_markup(text):
+        return text
+    text = _LINK_TEXT_RE.sub(r"\1", text)
+    text = _TAG_RE.sub("", text)
+    text = _EMPHASIS_RE.sub(lambda match: match.group(2) or match.group(4), text)
+    return html.unescape(_ESCAPE_RE.sub(r"\1", text)).strip()
+
+
+def slugify(text: str) -> str:
+    """Anchor for a heading: 'Getting Started!' -> 'getting-started'."""
+    return _SLUG_RE.sub('-', text.lower()).strip('-') or "section"
+
+
+def unique_anchor(text: str, used: set) -> str:
+    """Slug of the plain text of `text`, suffixed with -1, -2... until it is not in `used` (which it is added to)."""
+    base = anchor = slugify(plain_text(text))
+    n = 0
+    while anchor in used:
+        n += 1
+        anchor = f"{base}-{n}"
+    used.add(anchor)
+    return anchor
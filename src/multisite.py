@@ -0,0 +1,151 @@
+import json
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import reflex as rx
+from reflex import constants
+from reflex.config import get_config
+from reflex.environment import environment
+from reflex.utils import build, prerequisites
+
+from .blocks import block_registry_cache, source_cache_info
+from .build import optimize_static_site
+from .export import export_app
+from .highlight import highlight_cache_info
+from .parser import markdown_to_html
+from .settings import get_cache_dir, get_read_only
+from .watch import load_config
+
+logger = logging.getLogger(__name__)
+
+
+def cache_hits() -> dict:
+    """Hit counters of the in-memory caches shared by the sites a process builds."""
+    return {
+        "block_sources": source_cache_info().hits,
+        "markdown_html": markdown_to_html.cache_info().hits,
+        "highlight": highlight_cache_info().hits,
+    }
+
+
+def compile_frontend(app: rx.App, site_root: Path) -> Path:
+    """Compile `app` and build its static frontend in `site_root`, like `reflex export --frontend-only --no-zip`."""
+    environment.REFLEX_COMPILE_CONTEXT.set(constants.CompileContext.EXPORT)
+    environment.REFLEX_ENV_MODE.set(constants.Env.PROD)
+    if prerequisites.needs_reinit():
+        prerequisites.initialize_frontend_dependencies()
+    app._apply_decorated_pages()
+    app._compile(prerender_routes=True)
+    build.setup_frontend(site_root)
+    build.build()
+    return site_root / ".web" / "build" / "client"
+
+
+def build_site(site_root: Path, skip_frontend: bool = False) -> dict:
+    """Export one site into a fresh rx.App, then build and optimize its frontend into <site_root>/dist.
+
+    Runs in the current working directory of the site, since Reflex reads
+    rxconfig.py and writes .web/ relative to it.
+    """
+    result = {"site": str(site_root), "ok": False}
+    caches_before = cache_hits()
+    start = time.perf_counter()
+    cwd = Path.cwd()
+    # Block modules registered their memoized components and State classes with the previous site's app.
+    block_registry_cache.reset_modules()
+    try:
+        os.chdir(site_root)
+        config = get_config(reload=True)
+        app_folder = site_root.resolve() / config.app_name
+        site_config = load_config(app_folder)
+
+        app = rx.App()
+        report = export_app(app, app_folder)
+        if report is None:
+            raise FileNotFoundError(f"config.yml not found in {app_folder}")
+        result["export_s"] = time.perf_counter() - start
+        result["pages"] = report.counters["pages"]
+        result["pages_parsed"] = report.counters["pages_parsed"]
+        result["blocks_imported"] = report.counters["blocks_imported"]
+
+        if not skip_frontend:
+            step = time.perf_counter()
+            static_dir = compile_frontend(app, site_root.resolve())
+            result["frontend_s"] = time.perf_counter() - step
+
+            step = time.perf_counter()
+            cache_dir = get_cache_dir(app_folder, site_config, get_read_only(site_config))
+            stats = optimize_static_site(static_dir, site_root.resolve() / "dist", cache_dir)
+            result["optimize_s"] = time.perf_counter() - step
+            result["files"] = stats["files"]
+        result["ok"] = True
+    except Exception as e:
+        logger.exception(f"[build-all] {site_root} failed")
+        result["error"] = f"{type(e).__name__}: {e}"
+    finally:
+        os.chdir(cwd)
+    result["total_s"] = time.perf_counter() - start
+    # Work this site was spared by what earlier sites left in the shared caches.
+    result["cache_hits"] = {name: hits - caches_before[name] for name, hits in cache_hits().items()}
+    return result
+
+
+def build_sites(sites: list, skip_frontend: bool = False) -> list:
+    """Build `sites` one after another, sharing this process's in-memory caches between them."""
+    results = []
+    for site in sites:
+        logger.info(f"[build-all] Building {site}")
+        results.append(build_site(Path(site), skip_frontend=skip_frontend))
+    return results
+
+
+def build_all(sites: list, workers: int = 1, skip_frontend: bool = False) -> dict:
+    """Build several sites in this process, or split across `workers` forked processes.
+
+    Reflex and every shared module are imported once. Sites built by the
+    same process share rendered markdown, highlighted code and block
+    sources, while block modules are imported again for each site. Each
+    site's own build cache still skips its unchanged pages. Forked workers
+    start from this process's imports, and each one builds its share of the
+    sites in turn.
+    """
+    start = time.perf_counter()
+    sites = [str(Path(site)) for site in sites]
+    workers = max(1, min(workers, len(sites)))
+    if workers == 1:
+        results = build_sites(sites, skip_frontend)
+    else:
+        groups = [sites[i::workers] for i in range(workers)]
+        method = "fork" if "fork" in multiprocessing.get_all_start_methods() else None
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(method)) as executor:
+            by_site = {
+                result["site"]: result
+                for group in executor.map(build_sites, groups, [skip_frontend] * workers)
+                for result in group
+            }
+        results = [by_site[site] for site in sites]
+    return {"total_s": time.perf_counter() - start, "workers": workers, "sites": results}
+
+
+def write_results(summary: dict, path: Path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(summary, indent=2), encoding="utf-8")
+
+
+def format_results(summary: dict) -> str:
+    lines = [f"{'site':<40} {'pages':>6} {'parsed':>6} {'export':>8} {'frontend':>9} {'total':>8}"]
+    for result in summary["sites"]:
+        if not result["ok"]:
+            lines.append(f"{result['site']:<40} FAILED {result.get('error', '')}")
+            continue
+        lines.append(
+            f"{result['site']:<40} {result['pages']:>6} {result['pages_parsed']:>6} "
+            f"{result['export_s']:>7.2f}s {result.get('frontend_s', 0):>8.2f}s {result['total_s']:>7.2f}s"
+        )
+    failed = sum(not result["ok"] for result in summary["sites"])
+    lines.append(f"{len(summary['sites'])} site(s) in {summary['total_s']:.2f}s with {summary['workers']} worker(s), {failed} failed")
+    return "\n".join(lines)
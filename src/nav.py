@@ -0,0 +1,141 @@
+import logging
+import re
+from pathlib import PurePosixPath
+
+logger = logging.getLogger(__name__)
+
+
+def kebab_case(text: str) -> str:
+    """Convert 'Getting Started' -> 'getting-started'."""
+    text = text.strip()
+    text = re.sub(r"\s+", "-", text)
+    text = re.sub(r"[^\w\-]", "", text)
+    return text.lower()
+
+
+def folder_name(title: str) -> str:
+    """Folder a nav section lives in under pages/: 'Getting Started' -> 'getting_started'."""
+    return title.lower().replace(" ", "_")
+
+
+def route_for(page_path: str) -> str:
+    """Route of a page given its path relative to pages/ ('getting_started/intro.md' -> '/getting-started/intro')."""
+    parts = PurePosixPath(page_path.replace("\\", "/")).with_suffix("").parts
+    if parts[-1] == "index":
+        route = "/" + "/".join(parts[:-1]) + "/" if len(parts) > 1 else "/"
+    else:
+        route = "/" + "/".join(parts)
+    return route.replace("_", "-")
+
+
+class NavNode:
+    """A page or section of the nav, with its slug, folder, file and route precomputed."""
+
+    __slots__ = ("title", "slug", "value", "folder", "file", "route", "parent", "children", "excluded")
+
+    def __init__(self, title: str, value: str | None, folder: tuple, file: str, parent: "NavNode | None", excluded: bool = False):
+        self.title = title
+        self.slug = kebab_case(title)
+        self.value = value
+        self.folder = folder
+        self.file = file
+        self.route = route_for(file)
+        self.parent = parent
+        self.children = None if value is not None else []
+        self.excluded = excluded
+
+    @property
+    def is_section(self) -> bool:
+        return self.children is not None
+
+    def __repr__(self):
+        return f"NavNode({self.title!r}, route={self.route!r})"
+
+
+class NavTree:
+    """The `nav` list from config.yml, compiled once per build.
+
+    Sections map to folders under pages/ (with an index.md), pages map to
+    markdown files. Every node is reachable in O(1) by route or by file path.
+    """
+
+    def __init__(self):
+        self.roots = []
+        self.nodes = []
+        self.by_route = {}
+        self.by_file = {}
+
+    @classmethod
+    def compile(cls, nav: list, exclude_files=()) -> "NavTree":
+        tree = cls()
+        tree._add_items(nav or [], (), None, set(exclude_files))
+        return tree
+
+    def _add_items(self, items: list, folder: tuple, parent: NavNode | None, exclude_files: set):
+        for item in items:
+            if isinstance(item, dict):
+                for title, value in item.items():
+                    if isinstance(value, list):
+                        section_folder = folder + (folder_name(title),)
+                        node = NavNode(title, None, section_folder, "/".join(section_folder + ("index.md",)), parent)
+                        self._add_node(node, parent)
+                        self._add_items(value, section_folder, node, exclude_files)
+                    elif isinstance(value, str):
+                        node = NavNode(title, value, folder, "/".join(folder + (value,)), parent, value in exclude_files)
+                        self._add_node(node, parent)
+                    else:
+                        logger.warning(f"[nav] Unexpected nav value type {type(value)} for {title}")
+            elif isinstance(item, str):
+                title = item.replace(".md", "").capitalize()
+                node = NavNode(title, item, folder, "/".join(folder + (item,)), parent, item in exclude_files)
+                self._add_node(node, parent)
+            else:
+                logger.warning(f"[nav] Unexpected nav item type {type(item)}: {item}")
+
+    def _add_node(self, node: NavNode, parent: NavNode | None):
+        (parent.children if parent else self.roots).append(node)
+        self.nodes.append(node)
+        self.by_route.setdefault(node.route, node)
+        self.by_file.setdefault(node.file, node)
+
+    def sections(self):
+        return [node for node in self.nodes if node.is_section]
+
+    def files(self) -> set:
+        """Every markdown file the nav refers to, section index pages included."""
+        return set(self.by_file)
+
+    def main_nav(self) -> list:
+        """Top-level nav entries as [{"title", "url"}] for the navbar."""
+        return [{"title": node.title, "url": node.route} for node in self.roots]
+
+    def section_for(self, page_path: str) -> NavNode | None:
+        """Top-level section containing a page, given its path relative to pages/."""
+        top_folder = PurePosixPath(page_path).parts[0]
+        node = self.by_file.get(f"{top_folder}/index.md")
+        if node is not None and node.is_section and node.parent is None:
+            return node
+        return None
+
+    def neighbors(self, page_path: str) -> list:
+        """Routes a reader of a page is likely to open next: the next and previous visible page of its section.
+
+        A section's index page is followed by the section's first page.
+        """
+        node = self.by_file.get(page_path)
+        if node is None:
+            return []
+        if node.is_section:
+            visible = [child for child in node.children if not child.excluded]
+            return [visible[0].route] if visible else []
+        siblings = [child for child in (node.parent.children if node.parent else self.roots) if not child.excluded]
+        if node not in siblings:
+            return []
+        i = siblings.index(node)
+        return [sibling.route for sibling in siblings[i + 1:i + 2] + siblings[max(i - 1, 0):i]]
+
+    def sidebar_items(self, section: NavNode | None) -> dict:
+        """{label: route} of a section's visible children."""
+        if section is None:
+            return {}
+        return {child.slug: child.route for child in section.children if not child.excluded}
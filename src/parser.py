@@ -1,58 +1,344 @@
 import reflex as rx
 import re
-import inspect
-from typing import List, Dict, Callable
+import operator
+import functools
+import html
+import logging
+from typing import List, Dict, Callable, Iterable, Iterator
+from reflex.components.markdown.markdown import Markdown
+from .highlight import MAX_HIGHLIGHT_LINES, highlight_available, highlight_html
+from .markup import definitions, fence_spans, has_markup, iter_headings, plain_text, references_re, unique_anchor
+
+try:
+    from markdown_it import MarkdownIt
+except ImportError:  # Pre-rendering is optional; rx.markdown is used without it.
+    MarkdownIt = None
+
+logger = logging.getLogger(__name__)
+
+# Rendered HTML kept in memory, keyed by the markdown it came from.
+HTML_CACHE_SIZE = 1024
+
+HEADING_CLASSES = {1: "text-3xl py-1", 2: "text-2xl py-1"}
 
 markdown_component_map = {
-    "h1": lambda t: rx.heading(t, class_name="text-3xl py-1", id=t),
-    "h2": lambda t: rx.heading(t, class_name="text-2xl py-1", id=t),
+    "h1": lambda t: rx.heading(t, class_name=HEADING_CLASSES[1], id=t),
+    "h2": lambda t: rx.heading(t, class_name=HEADING_CLASSES[2], id=t),
 }
 
+# Heading text rendered as inline markdown: the paragraph it parses to becomes a span.
+inline_component_map = {
+    "p": lambda t: rx.el.span(t),
+}
+
+# Starts with a literal, so delimiters are found with a fast substring search;
+# headings and fences are found by their own line scans in markup.py.
+DELIMITER_RE = re.compile(r'--(\w+)(?:\((\w+)\))?--')
+# Line starts that would turn heading text into a block once it is parsed as a paragraph.
+_BLOCK_START_RE = re.compile(r'^(?:(?=[>#+-])|(?=[*_][ \t]*[*_][ \t]*[*_])|(?=\*(?:[ \t]|$))|\d{1,9}(?=[.)](?:[ \t]|$)))')
+_NON_SPACE_RE = re.compile(r'\S')
+
+
+class CachedMarkdown(Markdown):
+    """rx.markdown that hashes each component map once instead of on every call.
+
+    Reflex names a markdown component's map function after a hash of the
+    map, computed by rendering every entry of it. The maps used here never
+    change, so that hash is the same for every section of every page.
+    """
+
+    _map_hashes = {}
+
+    @staticmethod
+    def _component_map_hash(component_map: dict) -> str:
+        key = tuple(component_map.items())
+        digest = CachedMarkdown._map_hashes.get(key)
+        if digest is None:
+            digest = CachedMarkdown._map_hashes[key] = Markdown._component_map_hash(component_map)
+        return digest
+
+
+def _inline_source(text: str) -> str:
+    """Heading text as a one-line markdown document that parses to a single paragraph."""
+    match = _BLOCK_START_RE.match(text)
+    if match is None:
+        return text
+    return f"{text[:match.end()]}\\{text[match.end():]}"
+
+
+def heading_component(level: int, text: str, anchor: str) -> rx.Component:
+    """An h1/h2 whose text is rendered as inline markdown (code, emphasis, links)."""
+    if has_markup(text):
+        text = CachedMarkdown.create(_inline_source(text), component_map=inline_component_map)
+    return rx.heading(text, class_name=HEADING_CLASSES[level], id=anchor)
+
+
+def heading_html(level: int, text: str, anchor: str) -> str:
+    """Static HTML of `heading_component`; without markdown-it-py the text is escaped as is."""
+    if not has_markup(text):
+        inner = html.escape(text)
+    elif prerender_available():
+        inner = _markdown_renderer(None).renderInline(text)
+    else:
+        inner = html.escape(plain_text(text))
+    return f'<h{level} class="{HEADING_CLASSES[level]}" id="{anchor}">{inner}</h{level}>\n'
+
+
+def _render_heading_open(self, tokens, idx, options, env):
+    # Same classes as markdown_component_map, and an anchor unique within the section.
+    token = tokens[idx]
+    level = int(token.tag[1])
+    if level in HEADING_CLASSES:
+        token.attrSet("class", HEADING_CLASSES[level])
+        token.attrSet("id", unique_anchor(tokens[idx + 1].content, env.setdefault("anchors", set())))
+    return self.renderToken(tokens, idx, options, env)
+
+
+@functools.lru_cache(maxsize=None)
+def _markdown_renderer(highlight_lines: int | None):
+    md = MarkdownIt("commonmark", {"html": True}).enable(["table", "strikethrough"])
+    md.add_render_rule("heading_open", _render_heading_open)
+    if highlight_lines is not None:
+        def render_fence(self, tokens, idx, options, env):
+            token = tokens[idx]
+            return highlight_html(token.content, token.info, highlight_lines)
+        md.add_render_rule("fence", render_fence)
+    return md
+
+
+@functools.lru_cache(maxsize=HTML_CACHE_SIZE)
+def markdown_to_html(markdown: str, highlight_lines: int | None = None) -> str:
+    """Render markdown to HTML at build time; identical sections (e.g. shared snippets) render once.
+
+    Fenced code is highlighted with Pygments when `highlight_lines` (the
+    collapse threshold) is given.
+    """
+    return _markdown_renderer(highlight_lines).render(markdown)
+
+
+def prerender_available() -> bool:
+    return MarkdownIt is not None
+
+
+class Section:
+    """One token of a page: a markdown slice, an h1/h2 heading or a --command(argument)-- delimiter.
+
+    Content and heading sections keep offsets into the page source; the text
+    is only sliced out when `value` is read.
+    """
+
+    __slots__ = ("kind", "source", "start", "end", "command", "argument", "level", "anchor")
+
+    CONTENT = "content"
+    HEADING = "heading"
+    COMMAND = "command"
+
+    def __init__(
+        self,
+        kind: str,
+        source: str,
+        start: int,
+        end: int,
+        command: str | None = None,
+        argument: str | None = None,
+        level: int | None = None,
+        anchor: str | None = None,
+    ):
+        self.kind = kind
+        self.source = source
+        self.start = start
+        self.end = end
+        self.command = command
+        self.argument = argument
+        self.level = level
+        self.anchor = anchor
+
+    @property
+    def value(self) -> str:
+        return self.source[self.start:self.end].strip()
+
+    def to_record(self) -> list:
+        """Compact JSON-friendly form used by the build cache."""
+        if self.kind == Section.CONTENT:
+            return [self.kind, self.value]
+        if self.kind == Section.HEADING:
+            return [self.kind, self.level, self.value, self.anchor]
+        return [self.kind, self.command, self.argument]
+
+    @classmethod
+    def from_record(cls, record: list) -> "Section":
+        if record[0] == cls.CONTENT:
+            return cls(cls.CONTENT, record[1], 0, len(record[1]))
+        if record[0] == cls.HEADING:
+            return cls(cls.HEADING, record[2], 0, len(record[2]), level=record[1], anchor=record[3])
+        return cls(cls.COMMAND, "", 0, 0, record[1], record[2])
+
+    def __repr__(self):
+        if self.kind == Section.CONTENT:
+            return f"Section(content, {self.start}:{self.end})"
+        if self.kind == Section.HEADING:
+            return f"Section(heading, h{self.level}, {self.anchor!r})"
+        return f"Section(command, {self.command!r}, {self.argument!r})"
+
+
+def with_definitions(section: Section, page_definitions: list, references: re.Pattern | None) -> Section:
+    """`section` with the page's reference and footnote definitions it uses appended.
+
+    Each content section is rendered as its own markdown document, so a
+    definition elsewhere on the page would not resolve otherwise. Uses are
+    searched for in the page source, so the section's text is only copied
+    when a definition has to be added.
+    """
+    if references is None:
+        return section
+    labels = {match.group().lower() for match in references.finditer(section.source, section.start, section.end)}
+    if not labels:
+        return section
+    used = [
+        source for start, _, label, source in page_definitions
+        if f"[{label}]" in labels and not section.start <= start < section.end
+    ]
+    if not used:
+        return section
+    value = "\n\n".join([section.value, *used])
+    return Section(Section.CONTENT, value, 0, len(value))
+
+
+def iter_sections(content: str) -> Iterator[Section]:
+    """Tokenize a page, yielding sections as they are found.
+
+    Delimiters are matched by one regex over the page, and h1/h2 headings
+    outside fenced code blocks by a line scan; the two are sorted into
+    document order. Headings become their own sections, with an anchor
+    that is unique within the page. Whitespace-only gaps between tokens
+    are skipped without being copied.
+    """
+    fences = fence_spans(content)
+    page_definitions = definitions(content, fences)
+    references = references_re(page_definitions)
+    tokens = [(match.start(), match.end(), match) for match in DELIMITER_RE.finditer(content)]
+    tokens += [(start, end, heading) for start, end, *heading in iter_headings(content, fences)]
+    tokens.sort(key=operator.itemgetter(0))
+    current_pos = 0
+    used_anchors = set()
+    for start, end, token in tokens:
+        if start < current_pos:
+            # A delimiter inside heading text is part of the heading.
+            continue
+        if isinstance(token, re.Match):
+            section = Section(Section.COMMAND, content, start, end, token.group(1), token.group(2))
+        else:
+            level, text_start, text_end = token
+            section = Section(Section.HEADING, content, text_start, text_end, level=level)
+            section.anchor = unique_anchor(section.value, used_anchors)
+
+        if start > current_pos and _NON_SPACE_RE.search(content, current_pos, start):
+            yield with_definitions(Section(Section.CONTENT, content, current_pos, start), page_definitions, references)
+        yield section
+        current_pos = end
+
+    if _NON_SPACE_RE.search(content, current_pos):
+        yield with_definitions(Section(Section.CONTENT, content, current_pos, len(content)), page_definitions, references)
+
 
 class DelimiterParser:
-    """Parser that can render components or display their source code."""
+    """Parser that can render components or display their source code.
+
+    With `prerender`, markdown is converted to HTML at build time and
+    emitted as static HTML instead of being parsed by rx.markdown in the
+    browser. It falls back to rx.markdown when markdown-it-py is missing.
+    With `highlight`, show_code output (and fenced code, when pre-rendering)
+    is highlighted with Pygments at build time; code longer than
+    `highlight_lines` is collapsed instead. An `html_cache` (a
+    cache.HtmlCache) keeps pre-rendered HTML across builds.
+    `block_sources` ({name: source}, from blocks.load_block_sources) is
+    what show_code displays.
+    """
 
-    def __init__(self, components_registry: Dict[str, Callable]):
+    def __init__(
+        self,
+        components_registry: Dict[str, Callable],
+        prerender: bool = False,
+        highlight: bool = False,
+        highlight_lines: int = MAX_HIGHLIGHT_LINES,
+        html_cache=None,
+        block_sources: Dict[str, str] | None = None,
+    ):
         self.components_registry = components_registry
+        self.block_sources = block_sources or {}
+        self.prerender = prerender and prerender_available()
+        self.highlight_lines = highlight_lines if highlight and highlight_available() else None
+        self.html_cache = html_cache
 
-    def parse_and_render(self, content: str) -> List[rx.Component]:
-        """Parse content with --component-- or --show_code(component)-- delimiters."""
+    def to_html(self, content: str) -> str:
+        """`markdown_to_html`, through the persistent HTML cache when there is one."""
+        if self.html_cache is None:
+            return markdown_to_html(content, self.highlight_lines)
+        return self.html_cache.get(content, self.highlight_lines, markdown_to_html)
+
+    def markdown(self, content: str) -> rx.Component:
+        if self.prerender:
+            return rx.html(self.to_html(content))
+        return CachedMarkdown.create(content, component_map=markdown_component_map)
 
-        delimiter_pattern = r'--(\w+)(?:\((\w+)\))?--'
-        sections = []
-        current_pos = 0
+    @staticmethod
+    def tokenize(content: str) -> List[Section]:
+        """Split content into markdown and --command-- sections without rendering them."""
+        return list(iter_sections(content))
 
-        for match in re.finditer(delimiter_pattern, content):
-            if match.start() > current_pos:
-                text_content = content[current_pos:match.start()].strip()
-                if text_content:
-                    sections.append({'type': 'content', 'value': text_content})
+    @staticmethod
+    def toc(sections: Iterable[Section]) -> List[dict]:
+        """Heading index of a page: [{"level", "text", "anchor"}] in document order."""
+        return [
+            {"level": section.level, "text": plain_text(section.value), "anchor": section.anchor}
+            for section in sections
+            if section.kind == Section.HEADING
+        ]
 
-            command = match.group(1)
-            argument = match.group(2)
-            sections.append({'type': 'command', 'command': command, 'argument': argument})
-            current_pos = match.end()
+    @staticmethod
+    def referenced_names(sections: Iterable[Section]) -> List[str]:
+        """Block names used by --name-- and --show_code(name)-- sections, in first-use order."""
+        names = []
+        for section in sections:
+            if section.kind != Section.COMMAND:
+                continue
+            name = section.argument if section.command == 'show_code' else section.command
+            if name and name not in names:
+                names.append(name)
+        return names
+
+    @staticmethod
+    def shown_names(sections: Iterable[Section]) -> List[str]:
+        """Block names used by --show_code(name)-- sections, whose source the page displays."""
+        return list(dict.fromkeys(
+            section.argument
+            for section in sections
+            if section.kind == Section.COMMAND and section.command == 'show_code' and section.argument
+        ))
 
-        if current_pos < len(content):
-            remaining_content = content[current_pos:].strip()
-            if remaining_content:
-                sections.append({'type': 'content', 'value': remaining_content})
+    def render(self, sections: Iterable[Section]) -> List[rx.Component]:
+        """Build components from sections produced by `tokenize` or `iter_sections`."""
 
         components = []
         for section in sections:
-            if section['type'] == 'content':
-                components.append(rx.markdown(section['value'], component_map=markdown_component_map))
-            elif section['type'] == 'command':
-                command = section['command']
-                argument = section['argument']
+            if section.kind == Section.CONTENT:
+                components.append(self.markdown(section.value))
+            elif section.kind == Section.HEADING:
+                components.append(heading_component(section.level, section.value, section.anchor))
+            elif section.kind == Section.COMMAND:
+                command = section.command
+                argument = section.argument
 
                 if command == 'show_code':
-                    if argument and argument in self.components_registry:
-                        file_path = inspect.getfile(self.components_registry[argument])
-                        with open(file_path, "r") as f:
-                            source_code = f.read()
-                        md_code = f"```python\n{source_code}```"
-                        components.append(rx.markdown(md_code, component_map=markdown_component_map))
+                    if argument in self.components_registry and argument in self.block_sources:
+                        source_code = self.block_sources[argument]
+                        if self.highlight_lines is not None:
+                            components.append(rx.html(
+                                highlight_html(f"{source_code.rstrip()}\n", "python", self.highlight_lines, title=argument)
+                            ))
+                        else:
+                            md_code = f"```python\n{source_code.rstrip()}\n```"
+                            components.append(self.markdown(md_code))
                     else:
                         components.append(rx.box(f"Missing component for show_code: {argument}", color="red"))
                 elif command in self.components_registry and argument is None:
@@ -61,3 +347,21 @@ class DelimiterParser:
                     components.append(rx.box(f"Unknown component or command: {command}", color="red"))
 
         return components
+
+    def render_html(self, sections: Iterable[Section]) -> str | None:
+        """Static HTML of sections when pre-rendering, or None if one of them needs a component."""
+        if not self.prerender:
+            return None
+        parts = []
+        for section in sections:
+            if section.kind == Section.CONTENT:
+                parts.append(self.to_html(section.value))
+            elif section.kind == Section.HEADING:
+                parts.append(heading_html(section.level, section.value, section.anchor))
+            else:
+                return None
+        return "".join(parts)
+
+    def parse_and_render(self, content: str) -> List[rx.Component]:
+        """Parse content with --component-- or --show_code(component)-- delimiters."""
+        return self.render(iter_sections(content))
@@ -0,0 +1,99 @@
+import cProfile
+import io
+import json
+import logging
+import pstats
+import time
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+REPORT_NAME = "build-report.json"
+
+
+class BuildReport:
+    """Phase timers, counters and per-page stats for one export.
+
+    Phases and pages are accumulated while the build runs and written as a
+    JSON report at the end, with an optional top-N summary in the log.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = Counter()
+        self.counters = Counter()
+        self.pages = {}
+        self.details = {}
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] += time.perf_counter() - start
+
+    def count(self, name: str, amount: int = 1):
+        self.counters[name] += amount
+
+    def page(self, key: str, **stats):
+        """Add stats (seconds per step, bytes, components...) to a page's entry."""
+        entry = self.pages.setdefault(key, {})
+        for name, value in stats.items():
+            entry[name] = entry.get(name, 0) + value
+
+    def detail(self, name: str, data):
+        """Attach a structured section (e.g. per-folder stats) to the JSON report."""
+        self.details[name] = data
+
+    def page_seconds(self, key: str) -> float:
+        return sum(value for name, value in self.pages[key].items() if name.endswith("_s"))
+
+    def slowest(self, n: int) -> list:
+        ranked = sorted(self.pages, key=self.page_seconds, reverse=True)
+        return [(key, self.page_seconds(key)) for key in ranked[:n]]
+
+    def to_dict(self, top: int = 20) -> dict:
+        return {
+            "total_s": time.perf_counter() - self.started,
+            "phases_s": dict(self.phases),
+            "counters": dict(self.counters),
+            "slowest_pages": [{"page": key, "seconds": seconds} for key, seconds in self.slowest(top)],
+            "pages": self.pages,
+            **self.details,
+        }
+
+    def write(self, path: Path, top: int = 20):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.to_dict(top), indent=2), encoding="utf-8")
+        logger.info(f"[report] Build report written to {path}")
+
+    def summary(self, top: int = 10) -> str:
+        lines = [f"Build finished in {time.perf_counter() - self.started:.3f}s", "Phases:"]
+        for name, seconds in self.phases.most_common():
+            lines.append(f"  {name:<14} {seconds:8.3f}s")
+        lines.append("Counters:")
+        for name, value in sorted(self.counters.items()):
+            lines.append(f"  {name:<14} {value:>10}")
+        lines.append(f"Slowest {top} pages:")
+        for key, seconds in self.slowest(top):
+            lines.append(f"  {seconds:8.3f}s  {key}")
+        return "\n".join(lines)
+
+
+@contextmanager
+def profiled(output: Path, limit: int = 25):
+    """Run the body under cProfile, dump the stats to `output` and log the top entries."""
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        output.parent.mkdir(parents=True, exist_ok=True)
+        profiler.dump_stats(output)
+        stream = io.StringIO()
+        pstats.Stats(profiler, stream=stream).sort_stats("cumulative").print_stats(limit)
+        logger.info(f"[report] Profile written to {output}\n{stream.getvalue()}")
@@ -0,0 +1,90 @@
+import os
+from pathlib import Path
+
+
+class FileEntry:
+    """A file found by the scan, with the stat data the build needs."""
+
+    __slots__ = ("path", "rel", "size", "mtime_ns")
+
+    def __init__(self, path: Path, rel: str, size: int, mtime_ns: int):
+        self.path = path
+        self.rel = rel
+        self.size = size
+        self.mtime_ns = mtime_ns
+
+    @property
+    def signature(self) -> tuple:
+        return (self.mtime_ns, self.size)
+
+    def __repr__(self):
+        return f"FileEntry({self.rel!r}, size={self.size})"
+
+
+class SiteIndex:
+    """Markdown and block files under pages/, collected in a single os.scandir pass.
+
+    Every export stage queries this index instead of globbing or stat-ing
+    the source tree again.
+    """
+
+    def __init__(self, pages_dir: Path):
+        self.pages_dir = pages_dir
+        self.pages = {}
+        self.blocks = {}
+        self.block_entries = {}
+        self.folders = set()
+
+    @classmethod
+    def scan(cls, pages_dir: Path) -> "SiteIndex":
+        index = cls(pages_dir)
+        if pages_dir.is_dir():
+            index._scan(str(pages_dir), "")
+        index.pages = dict(sorted(index.pages.items()))
+        return index
+
+    def _scan(self, folder: str, rel: str):
+        self.folders.add(rel)
+        in_blocks = rel == "blocks" or rel.endswith("/blocks")
+        with os.scandir(folder) as entries:
+            for entry in entries:
+                rel_path = f"{rel}/{entry.name}" if rel else entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name != "__pycache__":
+                        self._scan(entry.path, rel_path)
+                elif entry.name.endswith(".md"):
+                    stat = entry.stat()
+                    self.pages[rel_path] = FileEntry(Path(entry.path), rel_path, stat.st_size, stat.st_mtime_ns)
+                elif in_blocks and entry.name.endswith(".py"):
+                    stat = entry.stat()
+                    file_entry = FileEntry(Path(entry.path), rel_path, stat.st_size, stat.st_mtime_ns)
+                    self.blocks.setdefault(rel, []).append(file_entry)
+                    self.block_entries[rel_path] = file_entry
+
+        if in_blocks:
+            self.blocks.setdefault(rel, []).sort(key=lambda file_entry: file_entry.rel)
+
+    def _rel(self, path: Path) -> str:
+        rel = Path(path).relative_to(self.pages_dir).as_posix()
+        return "" if rel == "." else rel
+
+    def md_files(self) -> list:
+        """Markdown entries sorted by path."""
+        return list(self.pages.values())
+
+    def has_folder(self, path: Path) -> bool:
+        return self._rel(path) in self.folders
+
+    def block_files(self, blocks_path: Path) -> list:
+        """blocks/*.py entries of a blocks folder, sorted by name."""
+        return self.blocks.get(self._rel(blocks_path), [])
+
+    def blocks_signature(self, blocks_path: Path) -> tuple:
+        return tuple((entry.path.name, *entry.signature) for entry in self.block_files(blocks_path))
+
+    def file_signature(self, py_file: Path) -> tuple | None:
+        entry = self.block_entries.get(self._rel(py_file))
+        return entry.signature if entry else None
+
+    def add_folder(self, path: Path):
+        self.folders.add(self._rel(path))
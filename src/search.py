@@ -0,0 +1,283 @@
+import hashlib
+import json
+import logging
+import re
+from collections import Counter, defaultdict
+from pathlib import Path
+
+from .markup import DEFINITION_RE, plain_text
+from .parser import Section
+from .settings import GENERATED_DIR
+
+logger = logging.getLogger(__name__)
+
+SEARCH_DIR = f"{GENERATED_DIR}/search"
+INDEX_NAME = "index.json"
+SCRIPT_NAME = "search.js"
+# Terms are grouped into shards by their first characters; the client only
+# downloads the shards of the terms it looks up. Shards holding more than
+# MAX_SHARD_POSTINGS postings are split further by longer prefixes, so a
+# prefix lookup also loads every shard keyed by an extension of the prefix.
+PREFIX_LENGTH = 2
+MAX_SHARD_POSTINGS = 20000
+DOCS_PER_CHUNK = 500
+# Caps that keep the payload bounded on very large sites.
+MAX_TERMS_PER_PAGE = 300
+MAX_POSTINGS = 100
+MAX_BODY_COUNT = 10
+TITLE_WEIGHT = 10
+HEADING_WEIGHT = 5
+
+WORD_RE = re.compile(r"\w+")
+FENCE_RE = re.compile(r"^ {0,3}(`{3,}|~{3,}).*?^ {0,3}\1[ \t]*$", re.MULTILINE | re.DOTALL)
+LINK_TARGET_RE = re.compile(r"\]\([^)]*\)")
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have if in into is it its of on or so "
+    "that the their then there these this to was we were will with you your".split()
+)
+
+
+def words(text: str) -> list:
+    """Lowercased search terms of a text; search.js splits queries the same way."""
+    return [
+        word for word in WORD_RE.findall(text.lower())
+        if 2 <= len(word) <= 32 and word not in STOPWORDS
+    ]
+
+
+def page_terms(sections: list) -> dict:
+    """{term: weight} of a page from its headings and prose (code blocks, link targets and definitions left out).
+
+    The title is left out because it comes from the nav, which can change
+    without the page being rebuilt; `SearchIndex.add` weighs it in.
+    """
+    body = Counter()
+    weights = Counter()
+    for section in sections:
+        if section.kind == Section.CONTENT:
+            text = LINK_TARGET_RE.sub("]", FENCE_RE.sub("", section.value))
+            if "]:" in text:
+                # Reference definitions are copied into every section that uses them.
+                text = DEFINITION_RE.sub("", "\n" + text)
+            body.update(words(text))
+        elif section.kind == Section.HEADING:
+            for word in words(plain_text(section.value)):
+                weights[word] += HEADING_WEIGHT
+    for word, count in body.items():
+        weights[word] += min(count, MAX_BODY_COUNT)
+
+    top = sorted(weights.items(), key=lambda item: (-item[1], item[0]))[:MAX_TERMS_PER_PAGE]
+    return dict(top)
+
+
+def _split(terms: dict, length: int) -> dict:
+    """Group terms by their first `length` characters, splitting oversized groups by longer prefixes.
+
+    Terms no longer than a split prefix stay in that prefix's shard.
+    """
+    groups = defaultdict(dict)
+    for term, postings in terms.items():
+        groups[term[:length]][term] = postings
+
+    shards = {}
+    for prefix, group in groups.items():
+        if sum(len(postings) for postings in group.values()) <= MAX_SHARD_POSTINGS or len(group) == 1:
+            shards[prefix] = group
+            continue
+        shards[prefix] = {term: postings for term, postings in group.items() if len(term) <= length}
+        longer = {term: postings for term, postings in group.items() if len(term) > length}
+        shards.update(_split(longer, length + 1))
+    return {prefix: shard for prefix, shard in shards.items() if shard}
+
+
+def _dump(data) -> bytes:
+    return json.dumps(data, separators=(",", ":"), sort_keys=True, ensure_ascii=False).encode("utf-8")
+
+
+def _write_if_changed(path: Path, data: bytes) -> bool:
+    try:
+        if path.read_bytes() == data:
+            return False
+    except OSError:
+        pass
+    path.write_bytes(data)
+    return True
+
+
+class SearchIndex:
+    """Inverted index of the site, written as static JSON shards for search.js.
+
+    `index.json` maps each term prefix to a shard file and lists the doc
+    chunks. Shard and chunk files are named by the hash of their content, so
+    unchanged files are neither rewritten nor re-downloaded.
+    """
+
+    def __init__(self):
+        self.docs = []
+        self.postings = defaultdict(list)
+
+    def add(self, route: str, title: str, terms: dict):
+        doc = len(self.docs)
+        self.docs.append([route, title])
+        weights = dict(terms)
+        for word in words(title):
+            weights[word] = weights.get(word, 0) + TITLE_WEIGHT
+        for term, weight in weights.items():
+            self.postings[term].append([doc, weight])
+
+    def shards(self) -> dict:
+        """{prefix: {term: postings}}, best postings first."""
+        terms = {}
+        for term, postings in self.postings.items():
+            postings.sort(key=lambda posting: (-posting[1], posting[0]))
+            terms[term] = postings[:MAX_POSTINGS]
+        return _split(terms, PREFIX_LENGTH)
+
+    def write(self, out_dir: Path) -> dict:
+        """Write the index under `out_dir`, delete stale shards and return file/byte counts."""
+        out_dir.mkdir(parents=True, exist_ok=True)
+        files = {}
+        manifest = {
+            "chunk": DOCS_PER_CHUNK,
+            "stopwords": sorted(STOPWORDS),
+            "shards": {},
+            "docs": [],
+        }
+
+        def add_file(data) -> str:
+            payload = _dump(data)
+            name = f"{hashlib.sha256(payload).hexdigest()[:16]}.json"
+            files[name] = payload
+            return name
+
+        for prefix, shard in sorted(self.shards().items()):
+            manifest["shards"][prefix] = add_file(shard)
+        for start in range(0, len(self.docs), DOCS_PER_CHUNK):
+            manifest["docs"].append(add_file(self.docs[start:start + DOCS_PER_CHUNK]))
+
+        written = 0
+        for name, payload in files.items():
+            path = out_dir / name
+            if not path.exists():
+                path.write_bytes(payload)
+                written += 1
+        for path in out_dir.glob("*.json"):
+            if path.name != INDEX_NAME and path.name not in files:
+                path.unlink()
+        _write_if_changed(out_dir / INDEX_NAME, _dump(manifest))
+        _write_if_changed(out_dir / SCRIPT_NAME, SEARCH_JS.encode("utf-8"))
+
+        stats = {
+            "terms": len(self.postings),
+            "shards": len(manifest["shards"]),
+            "files_written": written,
+            "bytes": sum(len(payload) for payload in files.values()),
+        }
+        logger.info(
+            f"[search] {len(self.docs)} page(s), {stats['terms']} term(s) in {stats['shards']} shard(s), "
+            f"{stats['bytes']} bytes ({written} file(s) written)"
+        )
+        return stats
+
+
+SEARCH_JS = r"""(function () {
+  var base = "/buridan/search/";
+  var limit = 10;
+  var index = null, files = {}, timer = null;
+
+  function load(name) {
+    if (!files[name]) files[name] = fetch(base + name).then(function (r) { return r.json(); });
+    return files[name];
+  }
+
+  function words(query, stopwords) {
+    return (query.toLowerCase().match(/[\p{L}\p{N}_]+/gu) || []).filter(function (w) {
+      return w.length >= 2 && w.length <= 32 && stopwords.indexOf(w) < 0;
+    });
+  }
+
+  // Shards that can hold terms starting with `term`: the one keyed by its
+  // longest prefix and, as oversized shards are split by longer prefixes,
+  // every shard keyed by an extension of it.
+  function shardNames(shards, term, partial) {
+    var names = [];
+    for (var n = term.length; n >= 1 && !names.length; n--) {
+      if (shards[term.slice(0, n)]) names.push(shards[term.slice(0, n)]);
+    }
+    if (partial) {
+      Object.keys(shards).forEach(function (key) {
+        if (key.length > term.length && key.startsWith(term)) names.push(shards[key]);
+      });
+    }
+    return names;
+  }
+
+  async function search(query) {
+    if (!index) index = load("index.json");
+    var manifest = await index;
+    var terms = words(query, manifest.stopwords);
+    var scores = null;
+    for (var i = 0; i < terms.length; i++) {
+      var term = terms[i], found = new Map();
+      // The last word is still being typed, so it also matches as a prefix.
+      var partial = i === terms.length - 1;
+      var shards = await Promise.all(shardNames(manifest.shards, term, partial).map(load));
+      shards.forEach(function (shard) {
+        var keys = partial ? Object.keys(shard).filter(function (k) { return k.startsWith(term); }) : [term];
+        keys.forEach(function (key) {
+          (shard[key] || []).forEach(function (p) { found.set(p[0], (found.get(p[0]) || 0) + p[1]); });
+        });
+      });
+      if (scores === null) {
+        scores = found;
+      } else {
+        scores.forEach(function (score, doc) {
+          if (found.has(doc)) scores.set(doc, score + found.get(doc)); else scores.delete(doc);
+        });
+      }
+      if (!scores.size) return [];
+    }
+    if (scores === null) return [];
+    var top = Array.from(scores).sort(function (a, b) { return b[1] - a[1] || a[0] - b[0]; }).slice(0, limit);
+    return Promise.all(top.map(async function (hit) {
+      var chunk = await load(manifest.docs[Math.floor(hit[0] / manifest.chunk)]);
+      return chunk[hit[0] % manifest.chunk];
+    }));
+  }
+
+  function show(box, results) {
+    box.replaceChildren();
+    results.forEach(function (doc) {
+      var link = document.createElement("a");
+      link.href = doc[0];
+      link.textContent = doc[1];
+      link.style.cssText = "display:block;padding:0.5rem 0.75rem;font-size:0.875rem;text-decoration:none;color:var(--slate-12)";
+      box.appendChild(link);
+    });
+    box.style.display = results.length ? "block" : "none";
+  }
+
+  document.addEventListener("input", function (event) {
+    if (event.target.id !== "buridan-search-input") return;
+    var query = event.target.value;
+    clearTimeout(timer);
+    timer = setTimeout(function () {
+      var box = document.getElementById("buridan-search-results");
+      search(query).then(function (results) {
+        if (event.target.value === query) show(box, results);
+      });
+    }, 150);
+  });
+
+  document.addEventListener("click", function (event) {
+    var box = document.getElementById("buridan-search-results");
+    if (box && !event.target.closest("#buridan-search")) box.style.display = "none";
+  });
+
+  document.addEventListener("keydown", function (event) {
+    if (event.key === "Escape" && event.target.id === "buridan-search-input") {
+      document.getElementById("buridan-search-results").style.display = "none";
+    }
+  });
+})();
+"""
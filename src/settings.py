@@ -0,0 +1,36 @@
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+
+
+TRUE_VALUES = ("1", "true", "yes", "on")
+# Folder under assets/ holding only files the build generates, so stale ones can be deleted
+# without touching the site's own assets. No leading underscore: Jekyll-based hosts skip those.
+GENERATED_DIR = "buridan"
+# Per-site timings written by `build-all`, in the working directory unless --report says otherwise.
+RESULTS_NAME = "build-all.json"
+
+
+def config_flag(config, key: str, env: str, default: bool) -> bool:
+    """Boolean option from $`env`, else `key` in config.yml, else `default`."""
+    value = os.environ.get(env, config.get(key, default))
+    return str(value).lower() in TRUE_VALUES
+
+
+def get_read_only(config) -> bool:
+    """Whether the build must not write into the source tree ($BURIDAN_READ_ONLY or `read_only` in config.yml)."""
+    return config_flag(config, "read_only", "BURIDAN_READ_ONLY", False)
+
+
+def get_cache_dir(base_path: Path, config, read_only: bool) -> Path:
+    """Where the build cache, report and profiles go ($BURIDAN_CACHE_DIR or `cache_dir` in config.yml).
+
+    In read-only mode a cache dir inside the app folder is swapped for one
+    under the system temp dir, keyed by the app folder's path.
+    """
+    cache_dir = base_path / os.environ.get("BURIDAN_CACHE_DIR", config.get("cache_dir", ".buridan"))
+    if read_only and cache_dir.resolve().is_relative_to(base_path.resolve()):
+        key = hashlib.sha1(str(base_path.resolve()).encode("utf-8")).hexdigest()[:12]
+        cache_dir = Path(tempfile.gettempdir()) / "buridan" / key
+    return cache_dir
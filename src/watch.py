@@ -0,0 +1,127 @@
+import json
+import os
+import time
+from pathlib import Path, PurePosixPath
+
+import yaml
+
+from .blocks import defined_names
+from .cache import MANIFEST_NAME
+from .settings import get_cache_dir, get_read_only
+
+WATCH_INTERVAL = 0.5
+DEBOUNCE_SECONDS = 0.3
+
+
+def _scan_pages(folder: str, rel: str, snapshot: dict):
+    with os.scandir(folder) as entries:
+        for entry in entries:
+            if entry.name.startswith((".", "__")):
+                continue
+            rel_path = f"{rel}/{entry.name}"
+            if entry.is_dir(follow_symlinks=False):
+                _scan_pages(entry.path, rel_path, snapshot)
+            elif entry.name.endswith(".md") or (entry.name.endswith(".py") and rel.endswith("/blocks")):
+                stat = entry.stat()
+                snapshot[rel_path] = (stat.st_mtime_ns, stat.st_size)
+
+
+def snapshot(app_folder: Path) -> dict:
+    """{path relative to the app folder: (mtime_ns, size)} of pages, block files and config.yml."""
+    result = {}
+    pages_folder = app_folder / "pages"
+    if pages_folder.is_dir():
+        _scan_pages(str(pages_folder), "pages", result)
+    config_path = app_folder / "config.yml"
+    if config_path.exists():
+        stat = config_path.stat()
+        result["config.yml"] = (stat.st_mtime_ns, stat.st_size)
+    return result
+
+
+def changed_paths(old: dict, new: dict) -> set:
+    """Paths added, removed or modified between two snapshots."""
+    return {path for path in old.keys() | new.keys() if old.get(path) != new.get(path)}
+
+
+def load_config(app_folder: Path) -> dict:
+    config_path = app_folder / "config.yml"
+    if not config_path.exists():
+        return {}
+    with config_path.open("r", encoding="utf-8") as f:
+        return yaml.safe_load(f) or {}
+
+
+def load_manifest_pages(app_folder: Path, config: dict) -> dict:
+    manifest_path = get_cache_dir(app_folder, config, get_read_only(config)) / MANIFEST_NAME
+    try:
+        return json.loads(manifest_path.read_text(encoding="utf-8")).get("pages", {})
+    except (OSError, ValueError):
+        return {}
+
+
+class ChangeTracker:
+    """Works out which pages a batch of file changes affects.
+
+    Remembers the names every block file defined at the previous batch, so
+    renaming or deleting a block still finds the pages that used it.
+    """
+
+    def __init__(self, app_folder: Path):
+        self.app_folder = app_folder
+        self.config = load_config(app_folder)
+        self.block_names = {}
+        for path in snapshot(app_folder):
+            if path.endswith(".py"):
+                self.block_names[path] = self._defined_names(path)
+
+    def _defined_names(self, path: str) -> set:
+        try:
+            return set(defined_names(self.app_folder / path))
+        except (OSError, SyntaxError):
+            return set()
+
+    def affected(self, changed: set) -> tuple:
+        """Return ({page: reason}, chrome_changed) for a batch of changed paths."""
+        pages = {}
+        chrome_changed = False
+        manifest_pages = None
+
+        for path in sorted(changed):
+            if path == "config.yml":
+                # Cached pages only depend on their markdown, so config.yml only changes the chrome.
+                self.config = load_config(self.app_folder)
+                chrome_changed = True
+            elif path.endswith(".md"):
+                pages[path.removeprefix("pages/")] = "content changed"
+            elif path.endswith(".py"):
+                new_names = self._defined_names(path)
+                names = self.block_names.get(path, set()) | new_names
+                self.block_names[path] = new_names
+                # pages/<folder>/blocks/<file>.py serves the pages directly in <folder>.
+                folder = PurePosixPath(path).parent.parent.relative_to("pages")
+                manifest_pages = manifest_pages or load_manifest_pages(self.app_folder, self.config)
+                for page, entry in manifest_pages.items():
+                    if PurePosixPath(page).parent == folder and names & set(entry.get("names", [])):
+                        pages.setdefault(page, f"{PurePosixPath(path).name} changed")
+
+        return pages, chrome_changed
+
+
+def watch(app_folder: Path, on_change, keep_running=lambda: True, interval: float = WATCH_INTERVAL, debounce: float = DEBOUNCE_SECONDS):
+    """Poll the app folder and call `on_change(changed_paths)` once a burst of writes settles."""
+    previous = snapshot(app_folder)
+    pending = set()
+    last_change = 0.0
+
+    while keep_running():
+        time.sleep(interval)
+        current = snapshot(app_folder)
+        changed = changed_paths(previous, current)
+        previous = current
+        if changed:
+            pending |= changed
+            last_change = time.monotonic()
+        elif pending and time.monotonic() - last_change >= debounce:
+            on_change(pending)
+            pending = set()